@@ -0,0 +1,81 @@
+"""
+応答の格納形式のメモリ比較。
+旧形式（トリガーごとの list と list の山札）と ResponseCorpus（文字列表 + 番号 array の山札）に、
+responses.yml の内容と合成したネタツイ N 件を載せ、tracemalloc で確保量と再読み込みの時間を測る。
+
+    python bench/corpus_bench.py [ネタツイ件数 ...]
+"""
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+import yaml
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+from response_corpus import ResponseCorpus, new_deck  # noqa: E402
+
+
+def load_sections(netatwi_count):
+    with open(os.path.join(REPO_DIR, "responses.yml"), encoding="utf-8") as f:
+        sections = yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader)) or {}
+    rng = random.Random(1)
+    base = list(sections.get("ネタツイ") or [])
+    sections["ネタツイ"] = base + [
+        f"ネタツイ {i}: {rng.choice(base) if base else ''}"[:140] for i in range(netatwi_count)
+    ]
+    return sections
+
+
+def build_legacy(sections):
+    """置き換え前の形（YAML のリストをそのまま持ち、山札は list(range(n))）"""
+    responses = {trigger: list(texts) for trigger, texts in sections.items()}
+    decks = {trigger: list(range(len(texts))) for trigger, texts in responses.items()}
+    for deck in decks.values():
+        random.shuffle(deck)
+    return responses, decks
+
+
+def build_corpus(sections):
+    corpus = ResponseCorpus().rebuild(sections)
+    decks = {trigger: new_deck(corpus.size(trigger)) for trigger in corpus}
+    for deck in decks.values():
+        random.shuffle(deck)
+    return corpus, decks
+
+
+def measure(build, sections):
+    """build が新たに確保したバイト数（応答文の文字列は除く）と所要時間"""
+    # 応答文そのものは両形式で共有されるので、コピーを渡して文字列の確保を揃える
+    copied = {trigger: [t.encode("utf-8").decode("utf-8") for t in texts] for trigger, texts in sections.items()}
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build(copied)
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, elapsed, result
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [0, 1000, 5000, 20000]
+    print(f"{'netatwi':>8} {'responses':>10} {'legacy KiB':>11} {'corpus KiB':>11} {'B/resp old':>11} {'B/resp new':>11} {'reload ms':>10}")
+    for count in counts:
+        sections = load_sections(count)
+        total = sum(len(texts) for texts in sections.values())
+        legacy_bytes, _, _ = measure(build_legacy, sections)
+        corpus_bytes, _, (corpus, _) = measure(build_corpus, sections)
+        # 再読み込み（変更のないセクションを写して作り直す）の時間
+        start = time.perf_counter()
+        corpus.rebuild(dict.fromkeys(corpus.sections))
+        reload_ms = (time.perf_counter() - start) * 1000
+        print(
+            f"{count:>8} {total:>10} {legacy_bytes / 1024:>11.1f} {corpus_bytes / 1024:>11.1f} "
+            f"{legacy_bytes / total:>11.1f} {corpus_bytes / total:>11.1f} {reload_ms:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+ベンチマーク用の discord.py の代役（Message / Channel / User / Client / Interaction）。
+main.py が実際に触る属性とメソッドだけを持ち、送信内容はメモリに記録する。
+"""
+import asyncio
+import itertools
+from datetime import datetime, timedelta, timezone
+
+
+# Discord のスナウフレークと同じく、新しいメッセージほど大きい ID を振る
+_ids = itertools.count(1_300_000_000_000_000_000)
+
+
+def next_id():
+    return next(_ids)
+
+
+class FakeUser:
+    def __init__(self, user_id, name, bot=False):
+        self.id = user_id
+        self.name = name
+        self.display_name = name
+        self.bot = bot
+        self.mention = f"<@{user_id}>"
+
+    def __eq__(self, other):
+        return getattr(other, "id", None) == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __str__(self):
+        return self.name
+
+
+class FakeReaction:
+    def __init__(self, emoji, count):
+        self.emoji = emoji
+        self.count = count
+
+
+class FakeMessage:
+    def __init__(self, channel, author, content, reactions=(), message_id=None, created_at=None):
+        self.id = message_id or next_id()
+        self.channel = channel
+        self.author = author
+        self.content = content
+        self.reactions = list(reactions)
+        self.created_at = created_at or datetime.now(timezone.utc)
+        self.added_reactions = []
+
+    async def add_reaction(self, emoji):
+        self.added_reactions.append(emoji)
+
+
+class FakeChannel:
+    """
+    send() は送信内容を sent に積み、send_latency 秒だけ待つ（API 往復の代わり）。
+    history() は discord.py と同じく既定で新しい順、after 指定時は古い順に返す。
+    """
+
+    def __init__(self, channel_id, name, send_latency=0.0):
+        self.id = channel_id
+        self.name = name
+        self.mention = f"<#{channel_id}>"
+        self.send_latency = send_latency
+        self.messages = []  # 古い順
+        self.sent = []
+
+    def add_message(self, author, content, reactions=(), created_at=None):
+        msg = FakeMessage(self, author, content, reactions, created_at=created_at)
+        self.messages.append(msg)
+        return msg
+
+    async def send(self, content=None, **kwargs):
+        if self.send_latency:
+            await asyncio.sleep(self.send_latency)
+        self.sent.append(kwargs.get("embed") if content is None else content)
+        return FakeMessage(self, None, content or "")
+
+    async def fetch_message(self, message_id):
+        for msg in self.messages:
+            if msg.id == message_id:
+                return msg
+        raise LookupError(message_id)
+
+    async def history(self, limit=100, before=None, after=None, oldest_first=None):
+        if oldest_first is None:
+            oldest_first = after is not None
+        msgs = [
+            m for m in self.messages
+            if (before is None or m.id < before.id) and (after is None or m.id > after.id)
+        ]
+        if not oldest_first:
+            msgs.reverse()
+        if limit is not None:
+            msgs = msgs[:limit]
+        for msg in msgs:
+            yield msg
+
+
+class FakeClient:
+    def __init__(self):
+        self.channels = {}
+        self.user = FakeUser(1, "bot", bot=True)
+
+    def add_channel(self, channel):
+        self.channels[channel.id] = channel
+        return channel
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+
+class _Followup:
+    def __init__(self, sent):
+        self._sent = sent
+
+    async def send(self, content=None, **kwargs):
+        self._sent.append(kwargs.get("embed") if content is None else content)
+
+
+class _Response:
+    def __init__(self, sent):
+        self._sent = sent
+
+    async def defer(self, **kwargs):
+        pass
+
+    async def send_message(self, content=None, **kwargs):
+        self._sent.append(kwargs.get("embed") if content is None else content)
+
+
+class FakeInteraction:
+    def __init__(self, user, channel=None):
+        self.user = user
+        self.channel = channel
+        self.created_at = datetime.now(timezone.utc) - timedelta(milliseconds=1)
+        self.sent = []
+        self.response = _Response(self.sent)
+        self.followup = _Followup(self.sent)
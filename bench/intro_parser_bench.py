@@ -0,0 +1,86 @@
+"""
+自己紹介パーサーのマイクロベンチマーク。
+旧実装（項目ごとの re.search）と IntroParser を、コーパスの正解との一致数と処理時間で比べる。
+
+    python bench/intro_parser_bench.py [回数]
+"""
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from intro_parser import IntroParser  # noqa: E402
+
+CORPUS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "intro_corpus.json")
+REPEAT = 5
+
+
+def legacy_parse_intro(text):
+    """置き換え前の parse_intro（比較用）"""
+    data = {}
+    patterns = {
+        "name": r"(?:【)?名前(?:.*?】)?[:：\s]*(.*)",
+        "call": r"(?:【)?呼び方(?:.*?】)?[:：\s]*(.*)",
+        "age": r"(?:【)?年齢(?:.*?】)?[:：\s]*(.*)",
+        "like": r"(?:【)?趣味(?:.*?】)?[:：\s]*(.*)",
+        "message": r"(?:【)?(?:ひとこと|一言)(?:.*?】)?[:：\s]*(.*)"
+    }
+    for key, pattern in patterns.items():
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            val = match.group(1).strip()
+            data[key] = val if val else "未設定"
+        else:
+            data[key] = "未設定"
+    return data
+
+
+def accuracy(parse, corpus):
+    """項目単位で正解と一致した数と、全項目が一致したメッセージ数を返す"""
+    fields = messages = 0
+    misses = []
+    for i, sample in enumerate(corpus):
+        result = parse(sample["text"])
+        hit = sum(result.get(k) == v for k, v in sample["expected"].items())
+        fields += hit
+        if hit == len(sample["expected"]):
+            messages += 1
+        else:
+            misses.append(i)
+    return fields, messages, misses
+
+
+def timing(parse, texts, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in texts:
+            parse(text)
+    return (time.perf_counter() - start) / (rounds * len(texts))
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    with open(CORPUS_FILE, 'r', encoding='utf-8') as f:
+        corpus = json.load(f)
+    total_fields = sum(len(sample["expected"]) for sample in corpus)
+    texts = [sample["text"] for sample in corpus]
+
+    parser = IntroParser()
+    parsers = (("legacy", legacy_parse_intro), ("compiled", parser.parse))
+    # 計測は交互に REPEAT 回行い最小値を取る（実行中の負荷や周波数の変動で順番の有利・不利が出ないように）
+    best = {label: float("inf") for label, _ in parsers}
+    for _ in range(REPEAT):
+        for label, parse in parsers:
+            best[label] = min(best[label], timing(parse, texts, max(1, rounds // REPEAT)))
+    for label, parse in parsers:
+        fields, messages, misses = accuracy(parse, corpus)
+        print(
+            f"{label:>8}: {best[label] * 1e6:7.2f} us/msg | "
+            f"fields {fields}/{total_fields} | messages {messages}/{len(corpus)} | misses {misses}"
+        )
+
+
+if __name__ == "__main__":
+    main()
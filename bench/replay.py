@@ -0,0 +1,251 @@
+"""
+オフラインのベンチマーク / リプレイ。
+一時ディレクトリに config.json と responses.yml を用意して main.py を読み込み、
+fake_discord の代役チャンネルに合成（または記録済み）のメッセージを流して各処理の速度を測る。
+
+    python bench/replay.py                       # 合成メッセージ 2000 件
+    python bench/replay.py --input stream.jsonl  # 記録済みメッセージを再生
+    python bench/replay.py --save before.json
+    python bench/replay.py --compare before.json # 前回との差を表示
+
+記録済みメッセージは1行1件の JSON: {"channel": "main" | "intro", "author": "名前", "content": "本文"}
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+from fake_discord import FakeChannel, FakeClient, FakeInteraction, FakeMessage, FakeReaction, FakeUser  # noqa: E402
+
+MAIN_CHANNEL_ID = 1001
+INTRO_CHANNEL_ID = 1002
+NETATWI_CHANNEL_ID = 1003
+LOG_CHANNEL_ID = 1004
+ADMIN_ID = 9
+
+CHATTER = [
+    "おはよう", "今日も暑いね", "それな", "草", "了解です", "ありがとう！",
+    "昨日の配信見た？", "明日は雨らしい", "お腹すいた", "いまから作業します",
+]
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def summarize(samples, elapsed):
+    samples = sorted(samples)
+    return {
+        "n": len(samples),
+        "ops_per_sec": len(samples) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(samples, 0.50) * 1000,
+        "p99_ms": percentile(samples, 0.99) * 1000,
+    }
+
+
+async def measure(func, items):
+    """items の要素ごとに func を呼び、1回ごとの所要時間と全体の時間を測る"""
+    samples = []
+    start = time.perf_counter()
+    for item in items:
+        t0 = time.perf_counter()
+        result = func(item)
+        if asyncio.iscoroutine(result):
+            await result
+        samples.append(time.perf_counter() - t0)
+    return summarize(samples, time.perf_counter() - start)
+
+
+def prepare_workdir(with_limits):
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    shutil.copy(os.path.join(REPO_DIR, "responses.yml"), workdir)
+    config = {
+        "allowed_channels": [MAIN_CHANNEL_ID],
+        "intro_channel_id": INTRO_CHANNEL_ID,
+        "netatwi_channel_id": NETATWI_CHANNEL_ID,
+        "log_channel_id": LOG_CHANNEL_ID,
+        "admin_user_id": [ADMIN_ID],
+    }
+    if not with_limits:
+        # 同じ利用者・トリガーを短時間に流すので、既定では流量制限を外して処理そのものを測る
+        config["response_limits"] = {"user": None, "channel": None, "trigger": None, "coalesce_seconds": 0}
+    with open(os.path.join(workdir, "config.json"), "w", encoding="utf-8") as f:
+        json.dump(config, f)
+    return workdir
+
+
+def load_bot(fake_client):
+    os.environ["DISCORD_TOKEN"] = ""  # client.run() させない
+    import main
+    main.startup_loader.join()
+    main.client.get_channel = fake_client.get_channel
+    # 日本語フォントの無い環境でのグラフ描画の警告は出さない
+    warnings.filterwarnings("ignore", message="Glyph .* missing")
+    # 標準出力へのログは止める（ファイルへの書き込みは本番と同じく残す）
+    main.log_listener.handlers = tuple(
+        h for h in main.log_listener.handlers if type(h) is not logging.StreamHandler
+    )
+    return main
+
+
+def synthetic_stream(main, channels, users, count, seed):
+    rng = random.Random(seed)
+    triggers = list(main.trigger_matcher.triggers)
+    with open(os.path.join(BENCH_DIR, "intro_corpus.json"), encoding="utf-8") as f:
+        intros = [sample["text"] for sample in json.load(f)]
+    stream = []
+    for _ in range(count):
+        roll = rng.random()
+        author = rng.choice(users)
+        if roll < 0.05:
+            stream.append((channels["intro"], author, rng.choice(intros)))
+        elif roll < 0.35 and triggers:
+            stream.append((channels["main"], author, f"{rng.choice(CHATTER)} {rng.choice(triggers)}"))
+        elif roll < 0.38:
+            stream.append((channels["main"], author, f"!user-info {rng.choice(users).name}"))
+        else:
+            stream.append((channels["main"], author, rng.choice(CHATTER)))
+    return stream
+
+
+def recorded_stream(path, channels):
+    users = {}
+    stream = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            name = row.get("author", "user")
+            author = users.setdefault(name, FakeUser(10_000 + len(users), name))
+            stream.append((channels.get(row.get("channel", "main"), channels["main"]), author, row["content"]))
+    return stream
+
+
+def fill_netatwi_history(channel, users, count, seed):
+    rng = random.Random(seed)
+    for i in range(count):
+        # 1割ほどにネタツイ認定のリアクションを付ける
+        reactions = [FakeReaction("🇳", rng.randint(1, 5))] if rng.random() < 0.1 else []
+        channel.add_message(rng.choice(users), f"ネタツイ候補 {i} {rng.choice(CHATTER)}", reactions)
+
+
+async def run(args):
+    results = {}
+    fake = FakeClient()
+    channels = {
+        "main": fake.add_channel(FakeChannel(MAIN_CHANNEL_ID, "main", args.send_latency)),
+        "intro": fake.add_channel(FakeChannel(INTRO_CHANNEL_ID, "intro", args.send_latency)),
+        "netatwi": fake.add_channel(FakeChannel(NETATWI_CHANNEL_ID, "netatwi", args.send_latency)),
+        "log": fake.add_channel(FakeChannel(LOG_CHANNEL_ID, "log", args.send_latency)),
+    }
+    main = load_bot(fake)
+    users = [FakeUser(10_000 + i, f"user{i}") for i in range(args.users)]
+    admin = FakeUser(ADMIN_ID, "admin")
+
+    if args.input:
+        stream = recorded_stream(args.input, channels)
+    else:
+        stream = synthetic_stream(main, channels, users, args.messages, args.seed)
+
+    # 1. トリガー判定（on_message の中で最も頻繁に走る部分）
+    contents = [content for _, _, content in stream]
+    results["trigger_match"] = await measure(main.trigger_matcher.find_first, contents)
+
+    # 2. 自己紹介の解析
+    intro_texts = [content for channel, _, content in stream if channel is channels["intro"]]
+    if not intro_texts:
+        with open(os.path.join(BENCH_DIR, "intro_corpus.json"), encoding="utf-8") as f:
+            intro_texts = [sample["text"] for sample in json.load(f)]
+    results["intro_parse"] = await measure(main.parse_intro, intro_texts * max(1, 1000 // len(intro_texts)))
+
+    # 3. on_message 全体（返信・ログ送信キュー・自己紹介保存を含む）
+    messages = [FakeMessage(channel, author, content) for channel, author, content in stream]
+    results["on_message"] = await measure(main.on_message, messages)
+
+    # 4. ネタツイのスキャン（全件 / チェックポイント以降の差分）
+    fill_netatwi_history(channels["netatwi"], users, args.history, args.seed)
+    results["netatwi_full_scan"] = await measure(
+        lambda _: main.scan_netatwi(channels["netatwi"], full=True), range(args.rounds)
+    )
+
+    async def incremental(_):
+        fill_netatwi_history(channels["netatwi"], users, 50, random.random())
+        await main.scan_netatwi(channels["netatwi"])
+    results["netatwi_incremental_scan"] = await measure(incremental, range(args.rounds))
+
+    # 5. レポート生成
+    results["monthly_report"] = await measure(
+        lambda _: main.generate_monthly_report(FakeInteraction(admin, channels["main"])), range(args.rounds)
+    )
+    results["netatwi_report"] = await measure(
+        lambda _: main.report_command.callback(FakeInteraction(admin, channels["main"]), "ネタツイ"), range(args.rounds)
+    )
+
+    await main.log_publisher.flush()
+    main.user_intros.flush_now()
+    return results
+
+
+def print_results(results, baseline=None):
+    print(f"{'benchmark':<26} {'n':>6} {'ops/s':>11} {'p50 ms':>9} {'p99 ms':>9}")
+    for name, r in results.items():
+        line = f"{name:<26} {r['n']:>6} {r['ops_per_sec']:>11.1f} {r['p50_ms']:>9.3f} {r['p99_ms']:>9.3f}"
+        base = (baseline or {}).get(name)
+        if base and base.get("ops_per_sec"):
+            line += f"  ({(r['ops_per_sec'] / base['ops_per_sec'] - 1) * 100:+.1f}% ops/s)"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="on_message などのオフラインベンチマーク")
+    parser.add_argument("--messages", type=int, default=2000, help="合成メッセージの件数")
+    parser.add_argument("--history", type=int, default=5000, help="ネタツイチャンネルの履歴件数")
+    parser.add_argument("--users", type=int, default=200, help="合成ユーザー数")
+    parser.add_argument("--rounds", type=int, default=5, help="スキャン・レポートの繰り返し回数")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--send-latency", type=float, default=0.0, help="send() ごとに待つ秒数")
+    parser.add_argument("--with-limits", action="store_true", help="流量制限を有効にしたまま測る")
+    parser.add_argument("--input", help="記録済みメッセージ (JSONL)")
+    parser.add_argument("--save", help="結果を JSON で保存する")
+    parser.add_argument("--compare", help="前回保存した結果と比較する")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    for path in ("input", "save"):
+        if getattr(args, path):
+            setattr(args, path, os.path.abspath(getattr(args, path)))
+
+    workdir = prepare_workdir(args.with_limits)
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        results = asyncio.run(run(args))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print_results(results, baseline)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
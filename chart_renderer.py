@@ -0,0 +1,81 @@
+"""レポート用グラフの描画（イベントループ外のワーカーで実行）"""
+import asyncio
+import io
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+# フォントファイルを直接指定（サーバーにインストール済みの IPAex ゴシック）
+JP_FONT_PATH = '/usr/share/fonts/opentype/ipaexfont-gothic/ipaexg.ttf'
+
+
+class ChartRenderer:
+    """
+    matplotlib の描画を専用スレッドで行う。
+    バックエンドとフォントは初回の描画時に1回だけ読み込み、同じ集計データの PNG はキャッシュから返す。
+    """
+
+    def __init__(self, font_path=JP_FONT_PATH, cache_size=8):
+        self.font_path = font_path
+        self.cache_size = cache_size
+        # pyplot のグローバル状態を共有しないよう、描画は1スレッドに直列化する
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chart")
+        self._cache = OrderedDict()
+        self._font = None
+        self._colors = None
+
+    def _prepare(self):
+        """ワーカースレッド内でバックエンドとフォントを読み込む"""
+        if self._font is not None:
+            return
+        import matplotlib
+        matplotlib.use("Agg")
+        from matplotlib import font_manager
+        if os.path.exists(self.font_path):
+            self._font = font_manager.FontProperties(fname=self.font_path)
+        else:
+            self._font = font_manager.FontProperties()
+        self._colors = matplotlib.colormaps["Paired"].colors
+
+    def _render_netatwi_pie(self, items):
+        self._prepare()
+        from matplotlib.figure import Figure
+
+        labels = [k for k, _ in items]
+        values = [v for _, v in items]
+
+        fig = Figure(figsize=(8, 6))
+        ax = fig.add_subplot()
+        patches, texts, autotexts = ax.pie(
+            values,
+            labels=labels,
+            autopct='%1.1f%%',
+            startangle=140,
+            colors=self._colors
+        )
+
+        # テキストラベル（ユーザー名など）に日本語フォントをセット
+        for t in texts:
+            t.set_fontproperties(self._font)
+
+        ax.set_title("ネタツイ ユーザー投稿割合", fontproperties=self._font, fontsize=16)
+
+        buf = io.BytesIO()
+        fig.savefig(buf, format='png', bbox_inches='tight')
+        return buf.getvalue()
+
+    async def netatwi_pie(self, data_dict):
+        """ユーザー別件数から円グラフの PNG を作り BytesIO で返す"""
+        key = tuple(data_dict.items())
+        png = self._cache.get(key)
+        if png is None:
+            png = await asyncio.get_running_loop().run_in_executor(
+                self.executor, self._render_netatwi_pie, key
+            )
+            self._cache[key] = png
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(key)
+        return io.BytesIO(png)
@@ -0,0 +1,69 @@
+"""自己紹介テンプレートの1パス解析"""
+import re
+
+
+# 既定の項目（config.json の intro_fields で上書きできる）
+DEFAULT_INTRO_FIELDS = {
+    "name": ["名前"],
+    "call": ["呼び方"],
+    "age": ["年齢"],
+    "like": ["趣味"],
+    "message": ["ひとこと", "一言"],
+}
+
+UNSET = "未設定"
+
+
+class IntroParser:
+    """
+    【名前/name】： や 名前： などの見出しと値を1つのコンパイル済み正規表現で拾い、
+    メッセージを1回走査するだけで全項目を取り出す。
+    """
+
+    def __init__(self, fields=None):
+        self.fields = fields or DEFAULT_INTRO_FIELDS
+        self.label_to_field = {}
+        for field, labels in self.fields.items():
+            for label in ([labels] if isinstance(labels, str) else labels):
+                self.label_to_field[label.lower()] = field
+        # 長いラベルを先に並べて「一言」と「一言コメント」のような前方一致の取り違えを防ぐ
+        labels = sorted(self.label_to_field, key=len, reverse=True)
+        alternation = "|".join(re.escape(label) for label in labels)
+        # 見出し: 行頭（箇条書き記号可）・「【」・全角空白の直後にラベル、
+        # 「/name」などの補足を挟んで 】・コロン・空白のいずれかで区切られる。
+        # 文中（「自己紹介です！名前：やま」など）の見出しはコロンで区切られているものだけ拾う。
+        delimiter = r"(?:[^】:：\n【]{0,20}?】[ \t　]*[:：]?|[^】:：\n【]{0,20}?[:：]|[ \t　]+|$)"
+        line_heading = rf"[ \t　・\-*●■◆>＞]*【?[ \t　]*(?:{alternation}){delimiter}"
+        # 値は行末まで。ただし「【」・全角空白に続く見出しと、半角空白・読点に続く「ラベル：」の手前で止める
+        # （「【趣味】ゲーム【特にRPG】」の【】は値に含める）。見出しでない文字はまとめて読み進める
+        value = (
+            rf"(?:[^\n【　 ,、，]+|[【　](?![ \t　]*(?:{alternation}))"
+            rf"|[ ,、，](?![ \t　]*(?:{alternation})[ \t]*[:：]))"
+        )
+        # 見出しの1文字目になりうる文字（記号・空白・ラベルの先頭）以外の位置は先読みだけで読み飛ばす
+        first_chars = "".join(sorted({re.escape(label[0]) for label in labels}))
+        # 同じ行に値が無ければ次の行（空行は飛ばす）を値として読む（「【名前】」の行の下に答えを書く形式）。
+        # 次の行が別の見出しなら読まない。findall で (label, inline, value, below) の組だけを受け取る
+        self.pattern = re.compile(
+            rf"(?=[ \t　・\-*●■◆>＞【{first_chars}])"
+            r"(?:(?:^[ \t　・\-*●■◆>＞]*【?|【|(?<=　))[ \t　]*"
+            rf"(?P<label>{alternation}){delimiter}"
+            rf"|(?P<inline>{alternation})[^】:：\n【]{{0,20}}?[:：])"
+            rf"[ \t　:：]*(?:(?P<value>{value}+)"
+            rf"|[ \t　]*\n(?:[ \t　]*\n)*(?!{line_heading})[ \t　]*(?P<below>{value}*))?",
+            re.MULTILINE | re.IGNORECASE,
+        )
+
+    def parse(self, text):
+        data = dict.fromkeys(self.fields, UNSET)
+        label_to_field = self.label_to_field
+        for label, inline, value, below in self.pattern.findall(text):
+            label = label or inline
+            field = label_to_field.get(label) or label_to_field[label.lower()]
+            # 同じ項目が複数あれば、値の入っている最初のものを採用
+            if data[field] is not UNSET:
+                continue
+            value = (value or below).strip()
+            if value:
+                data[field] = value
+        return data
@@ -0,0 +1,177 @@
+"""自己紹介データの保存（ユーザーIDごとに1件 + 別名インデックス）"""
+import asyncio
+import json
+import logging
+import os
+
+from user_lookup import UserLookupIndex
+
+
+class IntroStore:
+    """
+    自己紹介はユーザーIDをキーに1件だけ持ち、表示名・ユーザー名・自己紹介の名前は
+    aliases から ID を引く。保存は数秒まとめてから一時ファイル + rename で書き出す。
+    検索用の正規化インデックス (index) も更新のたびに差分で保守する。
+    """
+
+    def __init__(self, path, save_delay=5.0):
+        self.path = path
+        self.save_delay = save_delay
+        self.profiles = {}
+        self.aliases = {}
+        self.meta = {}  # 過去ログ取り込みのチェックポイントなど
+        self.index = UserLookupIndex()
+        self._save_task = None
+        self._dirty = False
+
+    def __len__(self):
+        return len(self.profiles)
+
+    def __contains__(self, key):
+        return self.resolve(key) is not None
+
+    # --- 読み込み ---
+    def load(self):
+        """
+        ファイルから読み直す。保存待ちの変更があれば先に書き出す（読み直しで消えないように）。
+        書き出しに失敗した場合は読み直さずに手元のデータを残す。
+        """
+        self.flush_now()
+        if self._dirty:
+            logging.warning("Intro data has unsaved changes. Skipped reload.")
+            return
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if "profiles" in data and "aliases" in data:
+            self.profiles = data["profiles"]
+            self.aliases = data["aliases"]
+            self.meta = data.get("meta", {})
+        else:
+            self._migrate_flat(data)
+            self._dirty = True
+        self._rebuild_index()
+
+    def _rebuild_index(self):
+        names = {user_id: [] for user_id in self.profiles}
+        for alias, user_id in self.aliases.items():
+            if user_id in names:
+                names[user_id].append(alias)
+        self.index = UserLookupIndex()
+        for user_id, aliases in names.items():
+            self.index.set_user(user_id, self._search_names(user_id, aliases))
+
+    def _search_names(self, user_id, aliases):
+        """検索対象の名前: ID・別名（表示名/ユーザー名）・自己紹介の名前と呼び方"""
+        profile = self.profiles.get(user_id, {})
+        names = [user_id, *aliases]
+        for field in ("name", "call"):
+            value = profile.get(field)
+            if value and value != "未設定":
+                names.append(value)
+        return names
+
+    def _migrate_flat(self, data):
+        """旧形式（名前やIDごとに同じ内容を重複保存）を ID 1件 + 別名へ変換する"""
+        groups = {}
+        for key, intro in data.items():
+            if not isinstance(intro, dict):
+                continue
+            groups.setdefault(json.dumps(intro, sort_keys=True, ensure_ascii=False), (intro, []))[1].append(key)
+        self.profiles, self.aliases = {}, {}
+        for n, (intro, keys) in enumerate(groups.values()):
+            ids = [k for k in keys if k.isdigit()]
+            # ID が残っていない古いデータは仮のキーで1件にまとめる
+            user_id = ids[0] if ids else f"legacy:{n}"
+            self.profiles[user_id] = dict(intro)
+            for key in keys:
+                if key != user_id:
+                    self.aliases[key] = user_id
+        logging.info(f"Migrated {len(data)} intro keys into {len(self.profiles)} profiles.")
+
+    # --- 参照・更新 ---
+    def resolve(self, key):
+        """ID または別名からユーザーIDを返す"""
+        key = str(key)
+        if key in self.profiles:
+            return key
+        return self.aliases.get(key)
+
+    def get(self, key, default=None):
+        user_id = self.resolve(key)
+        return self.profiles.get(user_id, default) if user_id else default
+
+    def search(self, query, limit=5):
+        """正規化・前方一致・あいまい一致で探し、[(user_id, score, 一致した名前)] を返す"""
+        return self.index.search(query, limit)
+
+    def put(self, user_id, intro, aliases=()):
+        """
+        プロフィールを保存し、別名を登録する。書き込みは schedule_save でまとめて行う。
+        内容が変わらなければ何もせず False を返す。
+        """
+        user_id = str(user_id)
+        if self.profiles.get(user_id) == intro and all(
+            not alias or alias == user_id or self.aliases.get(alias) == user_id for alias in aliases
+        ):
+            return False
+        self.profiles[user_id] = intro
+        for alias in aliases:
+            if alias and alias != user_id:
+                self.aliases[alias] = user_id
+        current = [a for a in aliases if a] + [a for a in self.index.users.get(user_id, ())]
+        self.index.set_user(user_id, self._search_names(user_id, current))
+        self._dirty = True
+        return True
+
+    def set_meta(self, key, value):
+        self.meta[key] = value
+        self._dirty = True
+
+    # --- 書き込み ---
+    def _snapshot(self):
+        return {"profiles": dict(self.profiles), "aliases": dict(self.aliases), "meta": json.loads(json.dumps(self.meta))}
+
+    def _write(self, snapshot):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        # 書き込み途中で落ちても元のファイルは壊れない
+        os.replace(tmp_path, self.path)
+
+    def flush_now(self):
+        """同期的に保存する（再起動直前など）"""
+        if not self._dirty:
+            return
+        self._dirty = False
+        try:
+            self._write(self._snapshot())
+        except Exception as e:
+            self._dirty = True
+            logging.error(f"Failed to save intro data: {e}")
+
+    async def flush(self):
+        if not self._dirty:
+            return
+        self._dirty = False
+        try:
+            await asyncio.to_thread(self._write, self._snapshot())
+        except Exception as e:
+            self._dirty = True
+            logging.error(f"Failed to save intro data: {e}")
+
+    def schedule_save(self):
+        """save_delay 秒後に1回だけ保存する。その間の更新はまとめて書き出される"""
+        if self._save_task is None or self._save_task.done():
+            self._save_task = asyncio.get_running_loop().create_task(self._delayed_flush())
+
+    async def _delayed_flush(self):
+        while True:
+            await asyncio.sleep(self.save_delay)
+            await self.flush()
+            # 書き込み中に更新があればもう一度まとめて保存する
+            if not self._dirty:
+                break
@@ -0,0 +1,99 @@
+"""時間のかかる管理ジョブ（Git同期・ネタツイ収集など）の多重実行防止と進捗"""
+import asyncio
+import logging
+import time
+
+
+class JobProgress:
+    """実行中のジョブの進捗（取得メッセージ数・ページ数・速度・残り時間の目安）"""
+
+    def __init__(self, kind, page_size=100, expected=None):
+        self.kind = kind
+        self.page_size = page_size
+        self.expected = expected  # 前回の同種ジョブの件数（ETA の目安）
+        self.started = time.monotonic()
+        self.messages = 0
+        self.phase = ""
+
+    def add(self, messages=1):
+        self.messages += messages
+
+    def set_phase(self, phase):
+        self.phase = phase
+
+    @property
+    def pages(self):
+        return -(-self.messages // self.page_size)
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    @property
+    def rate(self):
+        elapsed = self.elapsed
+        return self.messages / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self):
+        if not self.expected or not self.rate or self.messages >= self.expected:
+            return None
+        return (self.expected - self.messages) / self.rate
+
+    def describe(self):
+        parts = [self.phase] if self.phase else []
+        if self.messages:
+            parts.append(f"{self.pages} ページ / {self.messages} 件（{self.rate:.0f} 件/秒）")
+        if self.eta is not None:
+            parts.append(f"残り約 {self.eta:.0f} 秒")
+        parts.append(f"経過 {self.elapsed:.0f} 秒")
+        return " ・ ".join(parts)
+
+
+class JobCoordinator:
+    """
+    ジョブの種類ごとに同時実行を1つに絞る。
+    同じ種類・同じ引数 (key) のジョブが実行中なら、後から来た呼び出しはその実行に合流して同じ結果を受け取る。
+    引数が違う場合（差分収集中の全件収集など）は実行中のものが終わるのを待ってから実行する。
+    """
+
+    def __init__(self, page_size=100):
+        self.page_size = page_size
+        self.tasks = {}     # kind -> (key, Task, JobProgress)
+        self.last_count = {}  # (kind, key) -> 前回の取得件数
+
+    def running(self, kind):
+        """実行中ならその進捗を、なければ None を返す"""
+        entry = self.tasks.get(kind)
+        if entry and not entry[1].done():
+            return entry[2]
+        return None
+
+    async def run(self, kind, job, key=None):
+        """
+        job(progress) を実行して結果を返す。job は JobProgress を受け取るコルーチン関数。
+        待っている側がキャンセルされても、共有中のジョブは止めない。
+        """
+        while True:
+            entry = self.tasks.get(kind)
+            if entry is None or entry[1].done():
+                break
+            running_key, task, _ = entry
+            if running_key == key:
+                logging.info(f"Job '{kind}' already running. Attached to the in-flight run.")
+                return await asyncio.shield(task)
+            # 引数の違うジョブは終わるまで待つ（結果は使わない）
+            await asyncio.wait({task})
+
+        progress = JobProgress(kind, self.page_size, self.last_count.get((kind, key)))
+        task = asyncio.create_task(self._run(kind, job, key, progress))
+        self.tasks[kind] = (key, task, progress)
+        return await asyncio.shield(task)
+
+    async def _run(self, kind, job, key, progress):
+        try:
+            return await job(progress)
+        finally:
+            if progress.messages:
+                self.last_count[(kind, key)] = progress.messages
+            logging.info(f"Job '{kind}' finished in {progress.elapsed:.2f}s ({progress.messages} messages)")
@@ -0,0 +1,97 @@
+"""ログ出力のパイプライン（キュー経由の書き込み・日次ローテーション・gzip 圧縮）"""
+import atexit
+import gzip
+import logging
+import os
+import queue
+import re
+import shutil
+import time
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+
+
+LOG_FORMAT = '%(asctime)s [%(levelname)s] %(message)s'
+_exception_formatter = logging.Formatter()
+
+
+class LeanQueueHandler(QueueHandler):
+    """
+    呼び出し側（イベントループ）での処理を最小限にした QueueHandler。
+    メッセージの % 展開と例外の文字列化だけを行い、レコードの複製や書式化は書き込みスレッドに任せる。
+    """
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # 例外オブジェクトはスレッドをまたいで持たず、ここで文字列にしておく
+            record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class DailyGzipFileHandler(TimedRotatingFileHandler):
+    """
+    毎日 0 時にログを切り替え、前日分を <ログ名>.YYYY-MM-DD.gz に圧縮する。
+    retention_days より古いアーカイブは切り替えのたびに削除する。
+    処理はすべて QueueListener の書き込みスレッドで行われる。
+    """
+
+    def __init__(self, path, retention_days=30):
+        super().__init__(path, when="midnight", backupCount=0, encoding="utf-8")
+        self.retention_days = retention_days
+        self.rotator = self._rotate_and_compress
+
+    def _rotate_and_compress(self, source, dest):
+        os.rename(source, dest)
+        # 同じ日のアーカイブが既にあれば gzip のメンバーとして後ろに足す（gzip はそのまま続けて読める）
+        with open(dest, 'rb') as src, open(dest + ".gz", 'ab') as raw, gzip.GzipFile(fileobj=raw, mode='wb') as gz:
+            shutil.copyfileobj(src, gz)
+        # 圧縮が終わるまでは元のファイルを残す（LogRollup は元のファイルを優先して読む）
+        os.remove(dest)
+        self._remove_expired()
+
+    def _remove_expired(self):
+        if not self.retention_days:
+            return
+        directory, base = os.path.split(self.baseFilename)
+        pattern = re.compile(re.escape(base) + r"\.(\d{4}-\d{2}-\d{2})\.gz$")
+        cutoff = time.strftime('%Y-%m-%d', time.localtime(time.time() - self.retention_days * 86400))
+        for name in os.listdir(directory or "."):
+            match = pattern.match(name)
+            if match and match.group(1) < cutoff:
+                try:
+                    os.remove(os.path.join(directory, name))
+                except OSError:
+                    pass
+
+
+def setup_logging(log_path, level=logging.INFO, retention_days=30):
+    """
+    ルートロガーには QueueHandler だけを付け、ファイル・コンソールへの書き込みは
+    バックグラウンドスレッド (QueueListener) で行う。イベントループ上ではキューに積むだけになる。
+    戻り値: (QueueListener, DailyGzipFileHandler)
+    """
+    formatter = logging.Formatter(LOG_FORMAT)
+    file_handler = DailyGzipFileHandler(log_path, retention_days)
+    stream_handler = logging.StreamHandler()
+    for handler in (file_handler, stream_handler):
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, file_handler, stream_handler)
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(LeanQueueHandler(log_queue))
+    root.setLevel(level)
+    listener.start()
+    # 終了時にキューに残ったログを書き切る
+    atexit.register(stop_logging, listener)
+    return listener, file_handler
+
+
+def stop_logging(listener):
+    """キューに残ったログを書き出して書き込みスレッドを止める（os.execv の直前など）"""
+    if listener._thread is not None:
+        listener.stop()
@@ -0,0 +1,135 @@
+"""自動応答ログのログチャンネルへのまとめ送信"""
+import asyncio
+import logging
+import time
+from collections import Counter, deque
+
+import discord
+
+
+class LogChannelPublisher:
+    """
+    自動応答のたびにログチャンネルへ送らず、キューに積んで interval 秒ごとに1件の Embed にまとめて送る。
+    送信はバックグラウンドのタスクで行うので、ユーザーへの返信はログ送信を待たない。
+    溢れた分・送信に失敗した分はトリガー別の件数だけ残し、次の Embed に要約として載せる。
+    """
+
+    def __init__(self, get_channel, metrics=None, interval=5.0, max_lines=20, max_queue=200, max_backoff=60.0):
+        self.get_channel = get_channel  # 送信時に毎回チャンネルを引く（config の変更に追従する）
+        self.metrics = metrics
+        self.interval = interval
+        self.max_lines = max_lines
+        self.max_queue = max_queue
+        self.max_backoff = max_backoff
+        self.queue = deque()
+        self.overflow = Counter()  # 行として載せきれなかった分: トリガー -> 件数
+        self._task = None
+        self._wakeup = None
+        self._last_sent = 0.0
+        self._backoff = 0.0
+        self._stopping = False
+        self._idle = asyncio.Event()  # 送信中でなければセット（flush が送信の完了を待つ用）
+        self._idle.set()
+
+    def __len__(self):
+        return len(self.queue) + sum(self.overflow.values())
+
+    def publish(self, author_mention, trigger):
+        """ログを1件積む（待たない）。キューが一杯ならトリガー別の件数に畳む"""
+        if len(self.queue) >= self.max_queue:
+            self.overflow[trigger] += 1
+            self._count("summarized")
+        else:
+            self.queue.append((int(time.time()), author_mention, trigger))
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            # 前回の送信から interval 秒（失敗後はバックオフ分）空けて、その間の分をまとめる
+            wait = self._last_sent + self.interval + self._backoff - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            while (self.queue or self.overflow) and not self._stopping:
+                await self._send_batch()
+                if self.queue or self.overflow:
+                    await asyncio.sleep(self.interval + self._backoff)
+
+    def _take_batch(self):
+        lines = [self.queue.popleft() for _ in range(min(self.max_lines, len(self.queue)))]
+        # 1通に載せきれない分は要約に回す
+        while self.queue:
+            self.overflow[self.queue.popleft()[2]] += 1
+            self._count("summarized")
+        summary, self.overflow = self.overflow, Counter()
+        return lines, summary
+
+    def build_embed(self, lines, summary):
+        embed = discord.Embed(title="✨ 自動応答ログ", color=0x3498db)
+        embed.description = "\n".join(
+            f"<t:{ts}:T> {mention} → `{trigger}`" for ts, mention, trigger in lines
+        )
+        if summary:
+            top = ", ".join(f"`{t}` ×{n}" for t, n in summary.most_common(10))
+            embed.add_field(name=f"ほか {sum(summary.values())} 件（要約）", value=top[:1024], inline=False)
+        return embed
+
+    async def _send_batch(self):
+        lines, summary = self._take_batch()
+        channel = self.get_channel()
+        if channel is None:
+            self._count("dropped", len(lines) + sum(summary.values()))
+            return
+        self._last_sent = time.monotonic()
+        self._idle.clear()
+        try:
+            if self.metrics:
+                with self.metrics.timer("discord_send_seconds", target="log_channel"):
+                    await channel.send(embed=self.build_embed(lines, summary))
+            else:
+                await channel.send(embed=self.build_embed(lines, summary))
+            self._backoff = 0.0
+            self._count("sent", len(lines))
+        except Exception as e:
+            # レート制限や一時的な障害: 件数だけ要約に戻し、間隔を広げて再送する
+            retry_after = getattr(e, "retry_after", None)
+            self._backoff = min(self.max_backoff, retry_after or max(self.interval, self._backoff * 2))
+            for _, _, trigger in lines:
+                self.overflow[trigger] += 1
+            self.overflow.update(summary)
+            self._count("summarized", len(lines))
+            logging.error(f"Failed to send auto-response log ({len(self)} pending, retry in {self._backoff:.1f}s): {e}")
+        finally:
+            self._idle.set()
+
+    async def flush(self, timeout=10.0):
+        """残っているログを送り切る（再起動前など）"""
+        try:
+            await asyncio.wait_for(self._stop_and_drain(), timeout)
+        except asyncio.TimeoutError:
+            logging.error(f"Timed out flushing auto-response log ({len(self)} pending)")
+        finally:
+            self._stopping = False
+
+    async def _stop_and_drain(self):
+        task = self._task
+        if task is not None and not task.done():
+            # 送信中の1通は取り出し済みの行を持っているので、キャンセルせずに終わるのを待つ
+            self._stopping = True
+            await self._idle.wait()
+            task.cancel()
+        await self._drain()
+
+    async def _drain(self):
+        while self.queue or self.overflow:
+            await self._send_batch()
+            if self._backoff:
+                await asyncio.sleep(self._backoff)
+
+    def _count(self, state, n=1):
+        if self.metrics and n:
+            self.metrics.inc("log_channel_entries_total", n, state=state)
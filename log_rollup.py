@@ -0,0 +1,182 @@
+"""bot_activity.log のログレベル別・日別集計（差分読み込み）"""
+import gzip
+import json
+import os
+import re
+
+
+LEVEL_KEYS = {
+    "[INFO]": "OK",
+    "[WARNING]": "WARN",
+    "[ERROR]": "ERR",
+    "[CRITICAL]": "ERR",
+}
+
+
+# ファイルの同一性の判定に使う先頭部分の長さ（バイト）
+HEAD_BYTES = 256
+
+
+def new_day():
+    return {"OK": 0, "ERR": 0, "WARN": 0}
+
+
+class LogRollup:
+    """
+    ログファイルを前回読んだバイト位置から末尾まで読み、日別の集計に足し込む。
+    /status や /monthly-report はファイル全体を読まずに集計を参照できる。
+    日次ローテーションでファイルが替わった（inode か先頭部分が変わった）ときは、
+    直前のセグメント（最新のアーカイブ）の未読分だけを読んでから新しいファイルに移る。
+    """
+
+    def __init__(self, log_path, state_path, keep_days=400):
+        self.log_path = log_path
+        self.state_path = state_path
+        self.keep_days = keep_days
+        self.offset = 0
+        self.inode = None
+        self.head = None  # 読んでいるファイルの先頭 HEAD_BYTES バイト（inode は使い回されることがあるので併用する）
+        self.days = {}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return  # 壊れていたら先頭から集計し直す
+        self.offset = data.get("offset", 0)
+        self.inode = data.get("inode")
+        self.head = data.get("head")
+        self.days = data.get("days", {})
+
+    def save(self):
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"offset": self.offset, "inode": self.inode, "head": self.head, "days": self.days}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+
+    def reset(self):
+        self.offset = 0
+        self.head = None
+        self.days = {}
+        self.save()
+
+    def add_line(self, line):
+        day_key = line[:10]
+        if len(day_key) != 10 or day_key[4] != "-" or day_key[7] != "-":
+            return  # トレースバックなど日付で始まらない行は数えない
+        day = self.days.get(day_key)
+        if day is None:
+            day = self.days[day_key] = new_day()
+
+        for marker, key in LEVEL_KEYS.items():
+            if marker in line:
+                day[key] += 1
+                break
+
+    def refresh(self):
+        """前回の位置以降に追記された行だけを集計に反映する。反映した行数を返す"""
+        if not os.path.exists(self.log_path):
+            return 0
+        counted = 0
+        with open(self.log_path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            # 先頭部分はバイト列のまま latin-1 で文字列にして持つ（JSON に保存でき、途中で切れても比べられる）
+            head = f.read(HEAD_BYTES).decode('latin-1')
+            # 前回見たときより伸びただけなら先頭部分は前回のものから始まる
+            replaced = self.head is not None and not head.startswith(self.head)
+            if (self.inode is not None and st.st_ino != self.inode) or replaced:
+                # ローテーションされた: 前のセグメントの残りを数えてから先頭に戻る
+                counted += self._read_rotated_tail()
+                self.offset = 0
+            self.inode = st.st_ino
+            self.head = head
+            size = st.st_size
+            if size < self.offset:
+                # !logreset などでファイルが切り詰められた
+                self.offset = 0
+            chunk = b""
+            if size > self.offset:
+                f.seek(self.offset)
+                chunk = f.read(size - self.offset)
+        # 書きかけの最終行は次回に回す
+        end = chunk.rfind(b"\n") + 1
+        if end:
+            lines = chunk[:end].decode('utf-8', errors='replace').splitlines()
+            for line in lines:
+                self.add_line(line)
+            self.offset += end
+            counted += len(lines)
+        if counted or end:
+            self._prune()
+            self.save()
+        return counted
+
+    def _rotated_segments(self):
+        """ローテーション済みのセグメントを日付順に [(日付, パス)] で返す（圧縮前のものを優先）"""
+        directory, base = os.path.split(os.path.abspath(self.log_path))
+        pattern = re.compile(re.escape(base) + r"\.(\d{4}-\d{2}-\d{2})(\.gz)?$")
+        segments = {}
+        for name in os.listdir(directory):
+            match = pattern.match(name)
+            if match and (match.group(1) not in segments or not match.group(2)):
+                segments[match.group(1)] = os.path.join(directory, name)
+        return sorted(segments.items())
+
+    def _read_rotated_tail(self):
+        """直前に切り替わったセグメントを、前回読んだ位置から最後まで数える"""
+        segments = self._rotated_segments()
+        if not segments:
+            return 0
+        path = segments[-1][1]
+        try:
+            f = gzip.open(path, 'rb') if path.endswith(".gz") else open(path, 'rb')
+        except FileNotFoundError:
+            # 圧縮が終わって元のファイルが消えた直後
+            f = gzip.open(path + ".gz", 'rb')
+        with f:
+            # gzip は前から展開して読み飛ばす（このアーカイブ1つだけ）
+            f.seek(self.offset)
+            lines = f.read().decode('utf-8', errors='replace').splitlines()
+        for line in lines:
+            self.add_line(line)
+        return len(lines)
+
+    def _prune(self):
+        if len(self.days) > self.keep_days:
+            for day_key in sorted(self.days)[:len(self.days) - self.keep_days]:
+                del self.days[day_key]
+
+    def day(self, day_key):
+        return self.days.get(day_key) or new_day()
+
+    def totals(self, day_keys):
+        """指定日の集計を合算する"""
+        total = new_day()
+        for day_key in day_keys:
+            day = self.days.get(day_key)
+            if not day:
+                continue
+            for key in total:
+                total[key] += day.get(key, 0)
+        return total
+
+
+def tail_lines(path, count, block_size=4096):
+    """ファイル末尾から count 行を読む（先頭から全体を読まない）"""
+    if not os.path.exists(path):
+        return []
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        data = b""
+        while pos > 0 and data.count(b"\n") <= count:
+            read_size = min(block_size, pos)
+            pos -= read_size
+            f.seek(pos)
+            data = f.read(read_size) + data
+    lines = data.decode('utf-8', errors='replace').splitlines()
+    return lines[-count:]
@@ -1,3 +1,5 @@
+import time
+BOOT_STARTED = time.perf_counter() # 起動タイムライン計測の基準
 import discord
 import json
 import os
@@ -7,6 +9,7 @@ import logging
 import sys
 import subprocess
 import shutil
+import hashlib
 import re  # 正規表現用
 from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
@@ -14,28 +17,56 @@ import asyncio
 from apscheduler.schedulers.asyncio import AsyncIOScheduler # 追加
 from discord import app_commands
 # --- 追加ライブラリ ---
-import matplotlib.pyplot as plt
-import io
+import threading
+from array import array
+from collections import deque
+from trigger_matcher import TriggerMatcher
+from netatwi_store import NetatwiStore
+from metrics import MetricsRegistry
+from intro_store import IntroStore
+from intro_parser import IntroParser, DEFAULT_INTRO_FIELDS
+from log_publisher import LogChannelPublisher
+from response_limiter import ResponseLimiter
+from response_template import compile_response
+from response_snapshot import read_snapshot, snapshot_supported, write_snapshot
+from response_corpus import ResponseCorpus, new_deck
+from settings import Settings
+from job_coordinator import JobCoordinator
+from log_pipeline import setup_logging, stop_logging
+# グラフ描画・ログ集計は初回利用時に読み込む（get_chart_renderer / get_log_rollup）
 
 
-config = {}
-cached_responses = {}
-shuffle_pools = {}
-user_intros = {}
-
 # --- 1. ログの設定 ---
 LOG_FILE = "bot_activity.log"
 INTRO_DATA_FILE = "user_intros.json" # 自己紹介データ保存用
-
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(message)s',
-    handlers=[
-        logging.FileHandler(LOG_FILE, encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
+LOG_ROLLUP_FILE = "log_rollup.json" # ログの日別集計と読み込み位置
+METRICS_SNAPSHOT_FILE = "metrics_snapshot.json" # メトリクスの定期スナップショット
+HISTORY_PAGE_SIZE = 100 # channel.history が1リクエストで取得する件数
+NETATWI_DB_FILE = "netatwi.db" # ネタツイ収集結果とチェックポイント
+SHUFFLE_DECK_FILE = "shuffle_decks.json" # 山札の残り（再起動後も引き継ぐ）
+RESPONSES_SNAPSHOT_FILE = "responses.snapshot" # responses.yml のコンパイル済みスナップショット
+# libyaml があれば C 実装のローダーで解析する（スナップショットが古いときだけ使われる）
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+INTRO_EMBED_FIELDS = ("name", "call", "age", "like", "message") # !user-info で固定表示する項目
+
+
+# ログはキューに積むだけにして、ファイル・コンソールへの書き込みは別スレッドで行う
+# 毎日 0 時に bot_activity.log.YYYY-MM-DD.gz へ切り替え、log_retention_days 日より古いものは削除する
+log_listener, log_file_handler = setup_logging(LOG_FILE)
+
+metrics = MetricsRegistry(METRICS_SNAPSHOT_FILE)
+metrics_server = None
+scheduler = None
+intro_backfill_task = None
+log_rollup = None
+chart_renderer = None
+startup_timeline = []
+
+def mark_startup(phase):
+    """起動からの経過時間を記録する（on_ready でまとめてログに出す）"""
+    startup_timeline.append((phase, time.perf_counter() - BOOT_STARTED))
+
+mark_startup("import")
 
 load_dotenv()
 TOKEN = os.getenv('DISCORD_TOKEN')
@@ -45,101 +76,353 @@ intents.message_content = True
 client = discord.Client(intents=intents)
 tree = app_commands.CommandTree(client)
 
-config = {}
-cached_responses = {}
-shuffle_pools = {}
-user_intros = {}
+config = Settings() # config.json の内容（再読み込みでは新しい Settings に差し替える）
+response_corpus = ResponseCorpus() # 応答文の表とトリガーごとの番号配列
+shuffle_pools = {} # トリガー -> 山札（セクション内の位置の array）
+user_intros = IntroStore(INTRO_DATA_FILE)
+netatwi_store = NetatwiStore(NETATWI_DB_FILE)
+netatwi_seed_texts = set() # responses.yml のネタツイ（ストアが初めてスキャンするまでの仮の応答プール）
+netatwi_scan_cache = {}
+pending_netatwi_events = deque() # 収集中に届いたネタツイのイベント（収集の完了後に反映）
+yaml_sections = {} # トリガー -> responses.yml 上のセクションのハッシュ（変更の検出用）
+file_fingerprints = {}
+shuffle_decks_dirty = False
+response_templates = {} # プレースホルダーを含む応答文 -> ResponseTemplate（固定文は持たない）
+response_count = 0 # 登録されている応答の総数（{response_count} 用、読み込み時に集計）
+trigger_matcher = TriggerMatcher([])
+intro_parser = IntroParser()
+response_limiter = ResponseLimiter()
 
 # --- 追加機能: Git同期処理 ---
+async def run_git(*args, check=True, timeout=None, cwd=None):
+    """git をイベントループを止めずに実行し stdout を返す。タイムアウト・キャンセル時はプロセスを kill する"""
+    if timeout is None:
+        timeout = config.git_timeout
+    # safe.directory=* を追加して所有権エラーを回避
+    proc = await asyncio.create_subprocess_exec(
+        "git", "-c", "safe.directory=*", *args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        cwd=cwd
+    )
+    try:
+        out, err = await asyncio.wait_for(proc.communicate(), timeout)
+    except BaseException:
+        # TimeoutError / CancelledError どちらでも子プロセスを残さない
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+        raise
+    if check and proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, ["git", *args], out, err.decode(errors="replace"))
+    return out.decode(errors="replace")
+
+# Git同期・ネタツイ収集は種類ごとに1つだけ実行し、重なった呼び出しは実行中のものに合流させる
+jobs = JobCoordinator(HISTORY_PAGE_SIZE)
+
 async def sync_git_repository():
-    """Gitリポジトリを確認し、差分があればプルして反映する"""
+    """
+    Gitリポジトリを確認し、差分があればプルして反映する。
+    定期実行・/reload・/repair が重なっても実行は1回にまとめ、後から来た呼び出しは同じ結果を待つ。
+    """
+    return await jobs.run("git", _sync_git_repository)
+
+async def _sync_git_repository(progress):
+    result = {"updated": False, "fetch_seconds": None, "error": None}
+    sync_start = time.monotonic()
     try:
         logging.info("Checking for Git updates...")
         # 1. リモートの情報を更新
-        # safe.directory=* を追加して所有権エラーを回避
-        subprocess.run(["git", "-c", "safe.directory=*", "fetch"], check=True)
+        progress.set_phase("git fetch")
+        fetch_start = time.monotonic()
+        await run_git("fetch")
+        result["fetch_seconds"] = time.monotonic() - fetch_start
+        metrics.observe("git_fetch_seconds", result["fetch_seconds"])
+        logging.info(f"Git fetch finished in {result['fetch_seconds']:.2f}s")
         
         # 2. 現在のブランチとリモートの差分を確認
-        status = subprocess.run(
-            ["git", "-c", "safe.directory=*", "status", "-uno"], 
-            capture_output=True, 
-            text=True
-        ).stdout
+        status = await run_git("status", "-uno", check=False)
 
         if "Your branch is behind" in status or "can be fast-forwarded" in status:
             logging.info("Update found. Pulling changes from Git...")
+            progress.set_phase("git pull")
             # 強制的にGit側の内容で上書き（サーバー側の未コミット変更は破棄されるので注意）
-            subprocess.run(["git", "-c", "safe.directory=*", "reset", "--hard", "origin/main"], check=True)
-            subprocess.run(["git", "-c", "safe.directory=*", "pull"], check=True)
+            await run_git("reset", "--hard", "origin/main")
+            await run_git("pull")
             
             # ファイルが変わったので設定と応答を再読み込み
             load_config()
             load_responses()
+            result["updated"] = True
             logging.info("Git sync completed and responses reloaded.")
         else:
             logging.info("No updates found. Server is up to date.")
             
+    except asyncio.TimeoutError:
+        result["error"] = "timeout"
+        logging.error(f"Git sync error: timed out after {config.git_timeout}s")
+    except asyncio.CancelledError:
+        logging.warning("Git sync cancelled.")
+        raise
     except Exception as e:
+        result["error"] = str(e)
         logging.error(f"Git sync error: {e}")
+    metrics.observe("git_sync_seconds", time.monotonic() - sync_start)
+    metrics.inc("git_sync_total", status="error" if result["error"] else ("updated" if result["updated"] else "unchanged"))
+    return result
+
+def is_netatwi_emoji(emoji):
+    """ネタツイ判定用のリアクションかどうか"""
+    trigger_emoji = config.reaction_trigger
+    r_str = str(emoji)
+    return r_str == trigger_emoji or r_str == "🇳" or "regional_indicator_n" in r_str
+
+def get_netatwi_reaction_count(msg):
+    """ネタツイ判定用リアクションの数を返す（該当しなければ 0）"""
+    for reaction in msg.reactions:
+        if is_netatwi_emoji(reaction.emoji):
+            return reaction.count
+    return 0
+
+def make_netatwi_entry(msg):
+    """メッセージがネタツイ認定条件を満たせばエントリ dict を返す（/reload・/report・定期収集で共通）"""
+    content = msg.content.strip()
+    if msg.author.bot or not content:
+        return None
+    count = get_netatwi_reaction_count(msg)
+    if count < config.min_reaction_count or count == 0:
+        return None
+    return {
+        "message_id": msg.id,
+        "author_id": msg.author.id,
+        "author_name": msg.author.display_name,
+        "content": content,
+        "count": count,
+        "created_at": msg.created_at.isoformat(),
+    }
+
+def record_history_scan(scan, message_count):
+    """channel.history の取得件数とページ数（REST リクエスト数）を記録する"""
+    metrics.inc("history_messages_total", message_count, scan=scan)
+    metrics.inc("history_pages_total", message_count // HISTORY_PAGE_SIZE + 1, scan=scan)
+
+def store_netatwi_entry(channel_id, message_id, entry, added, removed):
+    """
+    1件をストアへ反映し（entry が None なら削除）、応答プールに足す本文・外す本文を added / removed に記録する。
+    スキャンとゲートウェイのイベントで共通。commit / rollback は呼び出し側で行う。
+    """
+    if entry:
+        new_text, gone_text = netatwi_store.upsert(channel_id, entry)
+    else:
+        new_text, gone_text = None, netatwi_store.delete(message_id)
+    if new_text:
+        added.add(new_text)
+        removed.discard(new_text)
+    if gone_text:
+        removed.add(gone_text)
+        added.discard(gone_text)
+
+async def scan_netatwi(channel, full=False, max_age=None, progress=None):
+    """
+    ネタツイ用チャンネルの共通スキャンエンジン。
+    チェックポイント以降だけを取得してストアを行単位で更新する。
+    full=True の場合はチェックポイントを捨てて全履歴を再スキャンする（管理者用）。
+    max_age 秒以内にスキャン済みならチャンネルを読まずに済ませる。
+    progress (JobProgress) を渡すと取得件数を逐次記録する。
+    戻り値: {"added", "removed", "scanned", "scanned_at"}（added/removed は本文の set）
+    """
+    scanned_at = netatwi_scan_cache.get(channel.id)
+    if not full and max_age is not None and scanned_at is not None and time.monotonic() - scanned_at < max_age:
+        return {"added": set(), "removed": set(), "scanned": 0, "scanned_at": scanned_at}
+
+    added, removed = set(), set()
+    scanned = 0
+
+    def apply(msg=None, message_id=None):
+        entry = None
+        if msg is not None:
+            if progress is not None:
+                progress.add()
+            message_id, entry = msg.id, make_netatwi_entry(msg)
+        store_netatwi_entry(channel.id, message_id, entry, added, removed)
 
-async def collect_netatwi_section():
-    target_channel_id = config.get("netatwi_channel_id")
-    if not target_channel_id:
+    try:
+        if full:
+            before = set(netatwi_store.texts(channel.id))
+            netatwi_store.clear_channel(channel.id)
+        last_id = netatwi_store.get_checkpoint(channel.id)
+
+        # 1. 直近ウィンドウの再スキャン（既知メッセージのリアクション増減・削除を拾う）
+        window = config.netatwi_recent_window
+        if last_id is not None and window > 0:
+            if progress is not None:
+                progress.set_phase("直近の再確認")
+            seen, oldest = set(), None
+            async for msg in channel.history(limit=window, before=discord.Object(id=last_id + 1)):
+                scanned += 1
+                seen.add(msg.id)
+                oldest = msg.id
+                apply(msg)
+            record_history_scan("netatwi_window", len(seen))
+            if oldest is not None:
+                # ウィンドウ内で見つからなかった候補は削除されたとみなす
+                for message_id in netatwi_store.message_ids_between(channel.id, oldest, last_id):
+                    if message_id not in seen:
+                        apply(message_id=message_id)
+
+        # 2. チェックポイント以降の新着のみ取得（初回・full は全履歴）
+        after = discord.Object(id=last_id) if last_id is not None else None
+        if progress is not None:
+            progress.set_phase("全履歴の取得" if last_id is None else "新着の取得")
+        fetched = 0
+        async for msg in channel.history(limit=None, after=after, oldest_first=True):
+            fetched += 1
+            last_id = msg.id
+            apply(msg)
+        scanned += fetched
+        record_history_scan("netatwi_full" if full else "netatwi_new", fetched)
+
+        netatwi_store.set_checkpoint(channel.id, last_id)
+        netatwi_store.commit()
+    except Exception:
+        netatwi_store.rollback()
+        raise
+
+    if full:
+        after_set = set(netatwi_store.texts(channel.id))
+        added, removed = after_set - before, before - after_set
+
+    netatwi_scan_cache[channel.id] = time.monotonic()
+    return {"added": added, "removed": removed, "scanned": scanned, "scanned_at": netatwi_scan_cache[channel.id]}
+
+def apply_netatwi_changes(added, removed):
+    """ストアの変更分だけを応答プール（コーパスのネタツイのセクション）と山札へ反映する"""
+    global trigger_matcher, response_count
+    if not added and not removed:
         return
+    if 'ネタツイ' not in response_corpus:
+        response_corpus.set_section('ネタツイ', [])
+        shuffle_pools['ネタツイ'] = new_deck()
+        trigger_matcher = TriggerMatcher(response_corpus.triggers())
+
+    before = response_corpus.size('ネタツイ')
+    if removed:
+        old_ids = response_corpus.sections['ネタツイ']
+        response_corpus.remove('ネタツイ', removed)
+        # 同じコーパス内なので番号の並びのまま付け替えられる
+        shuffle_pools['ネタツイ'] = reconcile_deck(shuffle_pools.get('ネタツイ'), old_ids, response_corpus.sections['ネタツイ'])
+    new_texts = response_corpus.extend_unique('ネタツイ', added)
+    response_count += response_corpus.size('ネタツイ') - before
+    for text in new_texts:
+        template = compile_response(text)
+        if template is not None:
+            response_templates[text] = template
+
+async def collect_netatwi_section(full=False, max_age=None):
+    """
+    ネタツイを差分収集してストアと応答プールに反映する。結果の dict を返す。
+    /reload・!collect-netatwi・/report・定期収集が重なった場合は実行中の収集に合流する。
+    """
+    return await jobs.run("netatwi", lambda progress: _collect_netatwi_section(full, max_age, progress), key=full)
 
-    trigger_emoji_config = config.get("reaction_trigger", "🇳").strip()
-    min_count = config.get("min_reaction_count", 1)
-    
-    channel = client.get_channel(target_channel_id)
-    new_responses = []
-
-    if channel:
-        logging.info(f"Scanning channel {channel.name} for netatwi...")
-        # 過去ログをスキャン
-        async for msg in channel.history(limit=None):
-            if msg.author.bot: continue
-            # 特定のリアクションがついているかチェック
-            for reaction in msg.reactions:
-                emoji_str = str(reaction.emoji)
-                # 絵文字が一致し、かつ指定数以上のリアクションがある場合
-                if (emoji_str == trigger_emoji_config or 
-                    emoji_str == "🇳" or 
-                    "regional_indicator_n" in emoji_str):
-                    
-                    if reaction.count >= min_count:
-                        if msg.content and msg.content not in new_responses:
-                            new_responses.append(msg.content)
-                        break 
-
-        # responses.yml の特定のセクションを更新する処理
-        if new_responses:
-            try:
-                with open('responses.yml', 'r', encoding='utf-8') as f:
-                    data = yaml.safe_load(f) or {}
-                
-                if 'ネタツイ' not in data:
-                    data['ネタツイ'] = []
-                
-                # 既存のネタツイと重複しないように追加
-                existing_set = set(data['ネタツイ'])
-                added_count = 0
-                for resp in new_responses:
-                    if resp not in existing_set:
-                        data['ネタツイ'].append(resp)
-                        added_count += 1
-                
-                if added_count > 0:
-                    with open('responses.yml', 'w', encoding='utf-8') as f:
-                        yaml.dump(data, f, allow_unicode=True, default_flow_style=False, sort_keys=False)
-                    
-                    # メモリ上のキャッシュも更新
-                    load_responses()
-                    logging.info(f"Collected {added_count} new netatwi responses.")
-                else:
-                    logging.info("No new netatwi responses to add.")
+async def _collect_netatwi_section(full, max_age, progress):
+    global netatwi_seed_texts
+    channel = config.channel("netatwi")
+    if not channel:
+        return None
 
-            except Exception as e:
-                logging.error(f"Failed to update responses.yml: {e}")
+    logging.info(f"Scanning channel {channel.name} for netatwi... (full={full})")
+    try:
+        scan = await scan_netatwi(channel, full=full, max_age=max_age, progress=progress)
+    except Exception as e:
+        logging.error(f"Failed to update netatwi store: {e}")
+        return {"error": e}
+    finally:
+        # スキャンの commit / rollback が済んでから、待たせていたイベントを反映する
+        apply_pending_netatwi_events()
+
+    removed = scan["removed"]
+    if netatwi_seed_texts:
+        # 初回のスキャン: 以降はストアが応答プールの元になるので、
+        # responses.yml から仮に入れていた分のうちチャンネルに見つからなかったものを外す
+        removed = removed | (netatwi_seed_texts - set(netatwi_store.texts()))
+        netatwi_seed_texts = set()
+    apply_netatwi_changes(scan["added"], removed)
+    result = {
+        "scanned": scan["scanned"],
+        "collected": netatwi_store.texts(channel.id),
+        "added": len(scan["added"]),
+        "removed": len(removed),
+    }
+    if result["added"] or result["removed"]:
+        logging.info(f"Netatwi updated: +{result['added']} / -{result['removed']} (scanned {result['scanned']})")
+    else:
+        logging.info(f"No netatwi changes. (scanned {result['scanned']})")
+    return result
+
+def update_netatwi_entries(channel_id, changes):
+    """
+    ゲートウェイのイベント1件分の変更 [(message_id, entry or None)] をストアと応答プールへ反映する。
+    entry が None のものは削除する。
+    ネタツイ収集の実行中は、スキャンのトランザクションを commit / rollback してしまわないよう
+    キューに積んでおき、スキャンが終わってから反映する。
+    """
+    if jobs.running("netatwi"):
+        pending_netatwi_events.append((channel_id, changes))
+        return
+    _update_netatwi_entries(channel_id, changes)
+
+def apply_pending_netatwi_events():
+    """収集中に届いたイベントを届いた順に反映する"""
+    while pending_netatwi_events:
+        channel_id, changes = pending_netatwi_events.popleft()
+        _update_netatwi_entries(channel_id, changes)
+
+def _update_netatwi_entries(channel_id, changes):
+    added, removed = set(), set()
+    try:
+        for message_id, entry in changes:
+            store_netatwi_entry(channel_id, message_id, entry, added, removed)
+        netatwi_store.commit()
+    except Exception as e:
+        netatwi_store.rollback()
+        logging.error(f"Failed to apply netatwi event: {e}")
+        return
+    apply_netatwi_changes(added, removed)
+    if added or removed:
+        logging.info(f"Netatwi updated live: +{len(added)} / -{len(removed)}")
+
+async def on_netatwi_reaction(payload, delta):
+    """ネタツイチャンネルでの判定用リアクションの追加・削除を、メッセージ1件単位で反映する"""
+    if payload.channel_id != config.netatwi_channel_id or not is_netatwi_emoji(payload.emoji):
+        return
+    event = "reaction_add" if delta > 0 else "reaction_remove"
+    # 1. キャッシュ済みのメッセージは discord.py がリアクション数を更新済みなので、そのまま判定し直す
+    msg = discord.utils.get(client.cached_messages, id=payload.message_id)
+    if msg is not None:
+        metrics.inc("netatwi_events_total", event=event, source="cache")
+        update_netatwi_entries(payload.channel_id, [(payload.message_id, make_netatwi_entry(msg))])
+        return
+    # 2. 登録済みのネタツイは本文を持っているので、リアクション数だけ増減させる
+    stored = netatwi_store.get(payload.message_id)
+    if stored is not None:
+        metrics.inc("netatwi_events_total", event=event, source="store")
+        count = stored["count"] + delta
+        entry = dict(stored, count=count) if count >= max(1, config.min_reaction_count) else None
+        update_netatwi_entries(payload.channel_id, [(payload.message_id, entry)])
+        return
+    # 3. 未登録のメッセージへの追加だけは本文が必要なので1件取得する
+    if delta > 0:
+        channel = client.get_channel(payload.channel_id)
+        if channel is None:
+            return
+        try:
+            msg = await channel.fetch_message(payload.message_id)
+        except discord.HTTPException as e:
+            logging.warning(f"Failed to fetch netatwi message {payload.message_id}: {e}")
+            return
+        metrics.inc("netatwi_events_total", event=event, source="fetch")
+        update_netatwi_entries(payload.channel_id, [(payload.message_id, make_netatwi_entry(msg))])
 
 async def scheduled_restart():
     """1週間ごとの定期再起動を実行"""
@@ -147,123 +430,315 @@ async def scheduled_restart():
     # 定期再起動であることを示すマーカーファイルを作成
     with open("scheduled_restart.marker", "w") as f:
         f.write("1")
+    await log_publisher.flush()
+    save_shuffle_decks()
+    metrics.save()
+    user_intros.flush_now()
+    stop_logging(log_listener)
     os.execv(sys.executable, ['python3'] + sys.argv)
 
 # --- 既存の読み込み関数 ---
-def load_config():
-    global config
-    with open('config.json', 'r', encoding='utf-8') as f:
-        config = json.load(f)
+def read_if_changed(path, force=False):
+    """
+    ファイルの指紋 (mtime / サイズ / sha256) を前回読み込み時と比べる。
+    内容が変わっていれば (bytes, 指紋) を、変わっていなければ (None, None) を返す。
+    指紋は読み込みに成功した後で file_fingerprints に記録すること。
+    """
+    st = os.stat(path)
+    prev = file_fingerprints.get(path)
+    if not force and prev and prev[:2] == (st.st_mtime_ns, st.st_size):
+        return None, None
+    with open(path, 'rb') as f:
+        raw = f.read()
+    fingerprint = (st.st_mtime_ns, st.st_size, hashlib.sha256(raw).hexdigest())
+    if not force and prev and prev[2] == fingerprint[2]:
+        # 更新日時だけ変わった（git reset など）場合は読み直さない
+        file_fingerprints[path] = fingerprint
+        return None, None
+    return raw, fingerprint
+
+def load_config(force=False):
+    """
+    config.json を Settings に変換して差し替える。検証に失敗した場合は SettingsError を送出し、
+    それまでの設定をそのまま使い続ける（途中まで更新された設定は見えない）。
+    """
+    global config, intro_parser
+    raw, fingerprint = read_if_changed('config.json', force)
+    if raw is None:
+        return config
+    new_config = Settings(json.loads(raw.decode('utf-8')), lambda channel_id: client.get_channel(channel_id))
+    # 自己紹介の項目設定が変わったときだけ解析用の正規表現を組み直す
+    intro_fields = new_config.intro_fields or DEFAULT_INTRO_FIELDS
+    if intro_fields != intro_parser.fields:
+        intro_parser = IntroParser(intro_fields)
+    # 流量制限の設定は入れ替えるだけで、使用中のバケットはそのまま引き継ぐ
+    response_limiter.configure(new_config.response_limits)
+    log_file_handler.retention_days = new_config.log_retention_days
+    config = new_config
+    file_fingerprints['config.json'] = fingerprint
     return config
 
-def load_responses():
-    global cached_responses, shuffle_pools
+def load_responses(force=False):
+    """
+    responses.yml を読み込む。内容が変わっていなければ何もしない。
+    変わったトリガーのセクションだけを差し替え、それ以外の山札はそのまま残す。
+    sha256 の一致するスナップショットがあれば YAML の解析とマッチャーの構築を省く。
+    """
+    global response_corpus, shuffle_pools, trigger_matcher, netatwi_seed_texts, yaml_sections, response_templates
     try:
-        with open('responses.yml', 'r', encoding='utf-8') as f:
-            cached_responses = yaml.safe_load(f)
-            shuffle_pools = {trigger: [] for trigger in cached_responses.keys()}
-        logging.info("Responses loaded.")
+        raw, fingerprint = read_if_changed('responses.yml', force)
+        if raw is None:
+            logging.info("responses.yml unchanged. Skipped reload.")
+            return False
+        snapshot = read_snapshot(RESPONSES_SNAPSHOT_FILE, fingerprint[2])
+        if snapshot is not None:
+            data = snapshot.sections
+        else:
+            data = yaml.load(raw.decode('utf-8'), Loader=YAML_LOADER) or {}
+
+        new_sections = {}
+        new_digests = {}
+        changed = []
+        for trigger, responses in data.items():
+            new_digests[trigger] = responses_digest(responses or [])
+            if yaml_sections.get(trigger) == new_digests[trigger] and trigger in response_corpus:
+                # 変更のないセクションは既存のもの（ネタツイの収集分を含む）を写す
+                new_sections[trigger] = None
+                continue
+            changed.append(trigger)
+            if trigger == 'ネタツイ':
+                # responses.yml のネタツイは旧 /reload の収集結果。ストアが一度もスキャンしていない間だけ
+                # 仮の応答プールとして使い、スキャン後は SQLite ストアの収集分だけを応答プールにする
+                if netatwi_store.scanned():
+                    netatwi_seed_texts = set()
+                    new_sections[trigger] = netatwi_store.texts()
+                else:
+                    netatwi_seed_texts = set(responses or [])
+                    stored = [t for t in netatwi_store.texts() if t not in netatwi_seed_texts]
+                    new_sections[trigger] = list(responses or []) + stored
+            else:
+                new_sections[trigger] = responses or []
+        if 'ネタツイ' not in data:
+            netatwi_seed_texts = set()
+            stored = netatwi_store.texts()
+            if stored:
+                changed.append('ネタツイ')
+                new_sections['ネタツイ'] = stored
+
+        # 文字列表は毎回作り直す（外れた応答を残さない。変更のない文字列はオブジェクトごと使い回す）
+        new_corpus = response_corpus.rebuild(new_sections)
+        removed = [t for t in response_corpus if t not in new_corpus]
+        # 変更のないトリガーの山札は途中の状態を引き継ぎ、変わったものはインデックスを付け替える
+        new_pools = {
+            trigger: (
+                reconcile_deck(shuffle_pools.get(trigger), response_corpus.texts(trigger), new_corpus.texts(trigger))
+                if trigger in changed else shuffle_pools.get(trigger, new_deck())
+            )
+            for trigger in new_corpus
+        }
+        # トリガーの構成・順序が変わったときだけマッチャーを組み直す（ファイル順を保持）
+        triggers = new_corpus.triggers()
+        if triggers != trigger_matcher.triggers:
+            if snapshot is not None and triggers == snapshot.triggers:
+                trigger_matcher = TriggerMatcher(triggers, snapshot.tables)
+            else:
+                trigger_matcher = TriggerMatcher(triggers)
+
+        response_corpus = new_corpus
+        shuffle_pools = new_pools
+        yaml_sections = new_digests
+        response_templates = compile_templates(
+            new_corpus, response_templates, snapshot.static_texts if snapshot else ()
+        )
+        file_fingerprints['responses.yml'] = fingerprint
+        if snapshot is None:
+            save_responses_snapshot(fingerprint[2], data)
+        stats = new_corpus.stats()
+        logging.info(
+            f"Responses loaded from {'snapshot' if snapshot else 'YAML'}. "
+            f"({len(changed)} changed / {len(removed)} removed sections, "
+            f"corpus: {stats['unique']} unique / {stats['references']} responses / {stats['bytes'] // 1024} KiB, "
+            f"matcher: {len(trigger_matcher.triggers)} triggers / {trigger_matcher.state_count} states)"
+        )
+        return True
     except Exception as e:
         logging.error(f"Failed to load responses.yml: {e}")
+        return False
 
-def load_intro_data():
-    global user_intros
-    if os.path.exists(INTRO_DATA_FILE):
-        try:
-            with open(INTRO_DATA_FILE, 'r', encoding='utf-8') as f:
-                user_intros = json.load(f)
-        except Exception as e:
-            logging.error(f"Failed to load intro data: {e}")
+def save_responses_snapshot(digest, data):
+    """YAML から読んだ内容をスナップショットに書き出す（次回の起動・再読み込みで使う）"""
+    if not snapshot_supported(data):
+        logging.info("responses.yml has non-list sections. Snapshot not written.")
+        return
+    try:
+        matcher = trigger_matcher if trigger_matcher.triggers == list(data) else TriggerMatcher(data.keys())
+        write_snapshot(RESPONSES_SNAPSHOT_FILE, digest, data, matcher)
+    except Exception as e:
+        logging.error(f"Failed to write responses snapshot: {e}")
 
-def save_intro_data():
+def compile_templates(corpus, previous=None, static_texts=()):
+    """
+    応答文を読み込み時にテンプレートへ変換する。前回と同じ文は変換済みのものを使い回す。
+    static_texts（スナップショットで固定文と分かっているもの）は解析しない。
+    応答の総数もここで集計し直す。
+    """
+    global response_count
+    previous = previous or {}
+    templates = {}
+    # コーパスの文字列表は重複がないので、同じ文を2回解析することはない
+    for text in corpus.strings:
+        if text in static_texts:
+            continue
+        template = previous[text] if text in previous else compile_response(text)
+        if template is not None:
+            templates[text] = template
+    response_count = corpus.total()
+    return templates
+
+JST = timezone(timedelta(hours=9))
+# テンプレートの値の名前 -> メッセージから値を作る関数（使われている値だけ計算する）
+TEMPLATE_VALUES = {
+    "user_name": lambda message: message.author.display_name,
+    "mention": lambda message: message.author.mention,
+    "channel": lambda message: message.channel.mention,
+    "response_count": lambda message: str(response_count),
+    "date": lambda message: datetime.now(JST).strftime('%Y/%m/%d'),
+    "time": lambda message: datetime.now(JST).strftime('%H:%M'),
+}
+
+def render_response(text, message):
+    """固定文はそのまま返し、テンプレートは必要な値だけ求めて差し込む"""
+    template = response_templates.get(text)
+    if template is None:
+        return text
+    return template.render({name: TEMPLATE_VALUES[name](message) for name in template.fields})
+
+def load_intro_data():
     try:
-        with open(INTRO_DATA_FILE, 'w', encoding='utf-8') as f:
-            json.dump(user_intros, f, ensure_ascii=False, indent=4)
+        user_intros.load()
     except Exception as e:
-        logging.error(f"Failed to save intro data: {e}")
+        logging.error(f"Failed to load intro data: {e}")
+
+def save_intro(author, intro_data):
+    """自己紹介をユーザーID 1件として保存し、表示名などを別名として登録する（書き込みは遅延・まとめて実行）"""
+    user_intros.put(author.id, intro_data, aliases=[author.display_name, author.name, intro_data.get("name")])
+    user_intros.schedule_save()
 
 def parse_intro(text):
     """
     テンプレートの崩れに強く対応した解析ロジック。
-    【名前/name】： でも 名前： でも抽出可能。
+    【名前/name】： でも 名前： でも抽出可能。項目は config.json の intro_fields で変更できる。
     """
-    data = {}
-    # 正規表現のポイント:
-    # (?:【)? -> 「【」があってもなくても良い
-    # 項目名    -> 「名前」「呼び方」など
-    # (?:.*?】)? -> 「/name】」などの補足があってもなくても良い
-    # [:：\s]* -> コロン（半角・全角）や空白が続いても良い
-    # (.*)      -> その後の文字列をすべて取得
-    patterns = {
-        "name": r"(?:【)?名前(?:.*?】)?[:：\s]*(.*)",
-        "call": r"(?:【)?呼び方(?:.*?】)?[:：\s]*(.*)",
-        "age": r"(?:【)?年齢(?:.*?】)?[:：\s]*(.*)",
-        "like": r"(?:【)?趣味(?:.*?】)?[:：\s]*(.*)",
-        "message": r"(?:【)?(?:ひとこと|一言)(?:.*?】)?[:：\s]*(.*)"
-    }
-    
-    for key, pattern in patterns.items():
-        # re.IGNORECASE で英字の大小を無視
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            # 前後の空白を消して格納
-            val = match.group(1).strip()
-            data[key] = val if val else "未設定"
-        else:
-            data[key] = "未設定"
-            
-    return data
+    return intro_parser.parse(text)
 
 def get_shuffled_response(trigger):
-    global shuffle_pools
-    if not shuffle_pools[trigger]:
-        shuffle_pools[trigger] = list(cached_responses[trigger])
-        random.shuffle(shuffle_pools[trigger])
-    return shuffle_pools[trigger].pop()
-
-# --- 追加: グラフ生成関数 ---
-import matplotlib.font_manager as fm
-
-def create_netatwi_pie_chart(data_dict):
-    labels = list(data_dict.keys())
-    values = list(data_dict.values())
+    """山札方式で応答を1つ引く。山札はセクション内の位置の配列で持つ"""
+    global shuffle_decks_dirty
+    corpus = response_corpus
+    ids = corpus.sections[trigger]
+    deck = shuffle_pools.get(trigger)
+    if not deck:
+        deck = new_deck(len(ids))
+        random.shuffle(deck)
+        shuffle_pools[trigger] = deck
+    shuffle_decks_dirty = True
+    return corpus.strings[ids[deck.pop()]]
+
+def reconcile_deck(deck, old_list, new_list):
+    """応答リストが変わったとき、残りの山札を新しいリストのインデックスへ付け替える"""
+    if not deck or old_list is None:
+        return new_deck()
+    if len(new_list) >= len(old_list) and new_list[:len(old_list)] == old_list:
+        # 末尾への追加だけならインデックスはそのまま使える
+        return deck
+    positions = {text: i for i, text in enumerate(new_list)}
+    return array('I', (positions[old_list[i]] for i in deck if i < len(old_list) and old_list[i] in positions))
+
+def responses_digest(responses):
+    return hashlib.sha1("\0".join(str(r) for r in responses).encode('utf-8')).hexdigest()
+
+def save_shuffle_decks(force=False):
+    """山札の残り（インデックス配列）を保存する。変更がなければ書き込まない"""
+    global shuffle_decks_dirty
+    if not shuffle_decks_dirty and not force:
+        return
+    # 書き込み中に引かれた分を次回の保存で拾えるよう、写し取る前に下ろしておく
+    shuffle_decks_dirty = False
+    data = {}
+    for trigger, deck in shuffle_pools.items():
+        if deck and trigger in response_corpus:
+            responses = response_corpus.texts(trigger)
+            # 応答リストの先頭 n 件のハッシュを添えておき、復元時に末尾追加だけなら引き継ぐ
+            data[trigger] = {"n": len(responses), "digest": responses_digest(responses), "deck": deck.tolist()}
+    try:
+        tmp_path = SHUFFLE_DECK_FILE + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, SHUFFLE_DECK_FILE)
+    except Exception as e:
+        shuffle_decks_dirty = True
+        logging.error(f"Failed to save shuffle decks: {e}")
 
-    # フォントファイルを直接指定（先ほどの確認結果に基づいています）
-    font_path = '/usr/share/fonts/opentype/ipaexfont-gothic/ipaexg.ttf'
-    jp_font = fm.FontProperties(fname=font_path)
+def restore_shuffle_decks():
+    """保存された山札を復元する。応答リストが変わっていたトリガーの山札は捨てる"""
+    if not os.path.exists(SHUFFLE_DECK_FILE):
+        return
+    try:
+        with open(SHUFFLE_DECK_FILE, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except Exception as e:
+        logging.error(f"Failed to load shuffle decks: {e}")
+        return
+    restored = 0
+    for trigger, saved in data.items():
+        if trigger not in response_corpus or response_corpus.size(trigger) < saved["n"]:
+            continue
+        if responses_digest(response_corpus.texts(trigger)[:saved["n"]]) != saved["digest"]:
+            continue
+        shuffle_pools[trigger] = array('I', saved["deck"])
+        restored += 1
+    logging.info(f"Restored {restored} shuffle deck(s).")
+
+def load_startup_data():
+    """応答・自己紹介・山札を読み込む（起動時は Discord へのログインと並行して別スレッドで実行）"""
+    load_responses()
+    restore_shuffle_decks()
+    load_intro_data()
+    mark_startup("data")
+
+def get_log_rollup():
+    global log_rollup
+    if log_rollup is None:
+        from log_rollup import LogRollup
+        log_rollup = LogRollup(LOG_FILE, LOG_ROLLUP_FILE)
+    return log_rollup
+
+def refresh_log_rollup():
+    get_log_rollup().refresh()
+
+def get_chart_renderer():
+    global chart_renderer
+    if chart_renderer is None:
+        from chart_renderer import ChartRenderer
+        chart_renderer = ChartRenderer()
+    return chart_renderer
 
-    plt.figure(figsize=(8, 6))
-    
-    # グラフの各パーツにフォントを適用
-    # labelsに対して fontproperties を指定
-    patches, texts, autotexts = plt.pie(
-        values, 
-        labels=labels, 
-        autopct='%1.1f%%', 
-        startangle=140, 
-        colors=plt.cm.Paired.colors
-    )
-    
-    # テキストラベル（ユーザー名など）に日本語フォントをセット
-    for t in texts:
-        t.set_fontproperties(jp_font)
-    
-    # グラフ中央の％表示（autotexts）は数字だけなのでそのままでもOKですが、念のため
-    # for at in autotexts:
-    #     at.set_fontproperties(jp_font)
+config = load_config()
+mark_startup("config")
+startup_loader = threading.Thread(target=load_startup_data, name="startup-loader", daemon=True)
+startup_loader.start()
+# 自動応答ログの送信キュー（チャンネルは送信のたびに config から引き直す）
+log_publisher = LogChannelPublisher(
+    lambda: config.channel("log"),
+    metrics,
+    interval=config.log_batch_interval,
+)
 
-    plt.title("ネタツイ ユーザー投稿割合", fontproperties=jp_font, fontsize=16)
-    
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png', bbox_inches='tight')
-    buf.seek(0)
-    plt.close()
-    return buf
+async def setup_hook():
+    # ゲートウェイ接続前に、並行して読み込んでいた応答データの完了を待つ
+    await asyncio.to_thread(startup_loader.join)
 
-config = load_config()
-load_responses()
-load_intro_data()
-admin_ids = config.get("admin_user_id", [])
+client.setup_hook = setup_hook
 
 # --- スラッシュコマンド定義 ---
 @tree.command(name="test", description="テストテキストを出力します")
@@ -271,102 +746,83 @@ async def test(interaction: discord.Interaction):
     # スラッシュコマンドへの返信
     await interaction.response.send_message("テストテキスト")
 
+async def run_with_status(status_msg, header, kind, coro, interval=3.0):
+    """ジョブの完了を待つ間、interval 秒ごとに進捗を status_msg に書き込む"""
+    task = asyncio.ensure_future(coro)
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=interval)
+        if done:
+            return task.result()
+        progress = jobs.running(kind)
+        if progress is None:
+            continue
+        try:
+            await status_msg.edit(content=f"{header}\n{progress.describe()}")
+        except Exception as e:
+            logging.warning(f"Failed to update progress message: {e}")
+
 @tree.command(name="reload", description="設定とGit同期、ネタツイ収集を実行（管理者のみ）")
-async def reload_command(interaction: discord.Interaction):
-    admin_ids = config.get("admin_user_id", [])
-    if interaction.user.id not in admin_ids:
+@app_commands.describe(full="チェックポイントを破棄して全期間を再スキャンする")
+async def reload_command(interaction: discord.Interaction, full: bool = False):
+    if not config.is_admin(interaction.user.id):
         await interaction.response.send_message("⚠️ 権限がありません。", ephemeral=True)
         return
 
     await interaction.response.defer()
-    status_msg = await interaction.followup.send("🔄 全期間のネタツイを再収集しています...", wait=True)
+    if full:
+        header = "🔄 全期間のネタツイを再収集しています..."
+    else:
+        header = "🔄 前回以降のネタツイを差分収集しています..."
+    if jobs.running("netatwi"):
+        header += "\n（実行中の収集に合流します）"
+    status_msg = await interaction.followup.send(header, wait=True)
     
     # 1. Git同期
-    await sync_git_repository()
+    await run_with_status(status_msg, header, "git", sync_git_repository())
     
-    # 2. ネタツイ収集設定
-    netatwi_id = config.get("netatwi_channel_id")
-    trigger_emoji = config.get("reaction_trigger", "🇳").strip()
-    target_channel = client.get_channel(netatwi_id)
-
-    collected_texts = []
-    scanned_messages_count = 0
-    if target_channel:
-        # 全てのメッセージを取得
-        async for msg in target_channel.history(limit=None):
-            scanned_messages_count += 1
-            if msg.author.bot: continue
-
-            for reaction in msg.reactions:
-                # 設定されたリアクション絵文字か判定 (柔軟な比較)
-                r_str = str(reaction.emoji)
-                if r_str == trigger_emoji or r_str == "🇳" or "regional_indicator_n" in r_str:
-                    content = msg.content.strip()
-                    if content and content not in collected_texts:
-                        collected_texts.append(content)
-                    break
-
-    # 3. responses.yml への反映
-    if scanned_messages_count > 0:
-        try:
-            # 既存のファイルを読み込む（他のセクションを消さないため）
-            if os.path.exists('responses.yml'):
-                with open('responses.yml', 'r', encoding='utf-8') as f:
-                    res_data = yaml.safe_load(f) or {}
-            else:
-                res_data = {}
-
-            # 「ネタツイ」セクションを更新（既存データを保持しつつ追加）
-            old_list = res_data.get("ネタツイ", [])
-            # 比較のため、ファイルから読み込んだリストも空白を除去し、重複を排除
-            old_set = {text.strip() for text in old_list if isinstance(text, str) and text.strip()}
-            collected_set = set(collected_texts) # 収集時に整形済み
-
-            # 新規追加、削除された件数を計算
-            added_count = len(collected_set - old_set)
-            removed_count = len(old_set - collected_set)
-
-            # 「ネタツイ」セクションを収集した最新のリストで完全に上書き
-            # これにより、スタンプが消されたものやメッセージ自体が削除されたものが反映される
-            # 順序を維持するために collected_texts をそのまま使う
-            res_data["ネタツイ"] = collected_texts
-            
-            with open('responses.yml', 'w', encoding='utf-8') as f:
-                yaml.dump(res_data, f, allow_unicode=True, default_flow_style=False, sort_keys=False)
-            
-            # メモリ上のキャッシュを更新
-            load_responses()
+    # 2. ネタツイ収集 & 応答プールへの反映（進捗を数秒おきにメッセージへ反映）
+    result = await run_with_status(status_msg, header, "netatwi", collect_netatwi_section(full=full))
+    if result is None:
+        await status_msg.edit(content="⚠️ ネタツイ用のチャンネルが見つかりません。")
+        return
+    if "error" in result:
+        await status_msg.edit(content=f"❌ ファイル書き込みエラー: {result['error']}")
+        return
 
-            # 収集結果をファイルに書き出す
-            report_filename = f"collected_netatwi_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-            with open(report_filename, "w", encoding="utf-8") as rf:
-                rf.write(f"--- ネタツイ収集結果 ({len(collected_texts)}件) ---\n\n")
-                for i, text in enumerate(collected_texts, 1):
-                    rf.write(f"[{i}]\n{text}\n\n---\n\n")
-            
-            await status_msg.edit(content=f"✅ 成功！\nスキャンメッセージ数 / 収集ネタ数: `{scanned_messages_count} / {len(collected_texts)}`\n新規追加: `{added_count}`件\n削除: `{removed_count}`件")
-            await interaction.followup.send(file=discord.File(report_filename))
-            
-            os.remove(report_filename)
-        except Exception as e:
-            await status_msg.edit(content=f"❌ ファイル書き込みエラー: {e}")
-    else:
-        await status_msg.edit(content=f"⚠️ 指定した期間・リアクションに合致するメッセージが見つかりませんでした。\nスキャンメッセージ数: `{scanned_messages_count}`件")
+    collected_texts = result["collected"]
+    try:
+        # 収集結果をファイルに書き出す
+        report_filename = f"collected_netatwi_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+        with open(report_filename, "w", encoding="utf-8") as rf:
+            rf.write(f"--- ネタツイ収集結果 ({len(collected_texts)}件) ---\n\n")
+            for i, text in enumerate(collected_texts, 1):
+                rf.write(f"[{i}]\n{text}\n\n---\n\n")
+        
+        mode_text = "全再構築" if full else "差分"
+        await status_msg.edit(content=f"✅ 成功！（{mode_text}）\nスキャンメッセージ数 / 収集ネタ数: `{result['scanned']} / {len(collected_texts)}`\n新規追加: `{result['added']}`件\n削除: `{result['removed']}`件")
+        await interaction.followup.send(file=discord.File(report_filename))
+        
+        os.remove(report_filename)
+    except Exception as e:
+        await status_msg.edit(content=f"❌ ファイル書き込みエラー: {e}")
 
 @tree.command(name="restart", description="ボットを再起動（管理者のみ）")
 async def restart_command(interaction: discord.Interaction):
-    admin_ids = config.get("admin_user_id", [])
-    if interaction.user.id not in admin_ids:
+    if not config.is_admin(interaction.user.id):
         await interaction.response.send_message("⚠️ 権限がありません。", ephemeral=True)
         return
     
     await interaction.response.send_message("🔄 再起動します...")
+    await log_publisher.flush()
+    save_shuffle_decks()
+    metrics.save()
+    user_intros.flush_now()
+    stop_logging(log_listener)
     os.execv(sys.executable, ['python3'] + sys.argv)
 
 @tree.command(name="repair", description="ボットの自己診断と自己修復を試みます（管理者のみ）")
 async def repair_command(interaction: discord.Interaction):
-    admin_ids = config.get("admin_user_id", [])
-    if interaction.user.id not in admin_ids:
+    if not config.is_admin(interaction.user.id):
         await interaction.response.send_message("⚠️ 権限がありません。", ephemeral=True)
         return
 
@@ -403,8 +859,10 @@ async def repair_command(interaction: discord.Interaction):
         report_lines.append(f"❌ `config.json` の読み込みに失敗: {e}")
 
     try:
-        load_responses()
-        report_lines.append("✅ `responses.yml` を再読み込みしました。")
+        if load_responses():
+            report_lines.append("✅ `responses.yml` を再読み込みしました。")
+        else:
+            report_lines.append("⏩ `responses.yml` は変更がないためスキップしました。（エラーはログを確認）")
     except Exception as e:
         report_lines.append(f"❌ `responses.yml` の読み込みに失敗: {e}")
 
@@ -417,8 +875,11 @@ async def repair_command(interaction: discord.Interaction):
     # --- 3. Git Sync ---
     report_lines.append("\n--- 3. Gitリポジトリ同期 ---")
     try:
-        await sync_git_repository()
-        report_lines.append("✅ Git同期処理が完了しました。（詳細はコンソールログを確認）")
+        git_result = await sync_git_repository()
+        if git_result["error"]:
+            report_lines.append(f"❌ Git同期中にエラーが発生: {git_result['error']}")
+        else:
+            report_lines.append(f"✅ Git同期処理が完了しました。（fetch: {git_result['fetch_seconds']:.2f}秒 / 詳細はコンソールログを確認）")
     except Exception as e:
         report_lines.append(f"❌ Git同期中にエラーが発生: {e}")
 
@@ -431,16 +892,13 @@ async def repair_command(interaction: discord.Interaction):
 async def status_command(interaction: discord.Interaction):
     now_dt = datetime.now()
     target_days = [(now_dt - timedelta(days=i)).strftime('%Y-%m-%d') for i in range(9)]
-    ok_count, err_count = 0, 0
-    recent_logs = []
-    if os.path.exists(LOG_FILE):
-        with open(LOG_FILE, "r", encoding="utf-8") as f:
-            lines = f.readlines()
-            for line in lines:
-                if line[:10] in target_days:
-                    if "[INFO]" in line: ok_count += 1
-                    elif "[ERROR]" in line: err_count += 1
-            recent_logs = [line.strip() for line in lines[-15:]]
+    # 日別集計は前回以降の追記分だけを読み込んで更新する
+    from log_rollup import tail_lines
+    rollup = get_log_rollup()
+    rollup.refresh()
+    totals = rollup.totals(target_days)
+    ok_count, err_count = totals["OK"], totals["ERR"]
+    recent_logs = [line.strip() for line in tail_lines(LOG_FILE, 15)]
     log_text = "\n".join(recent_logs) if recent_logs else "ログなし"
     embed = discord.Embed(title="📊 Bot 9日間統計", color=0x9b59b6, timestamp=now_dt)
     embed.add_field(name="✅ OK / ❌ ERR", value=f"{ok_count} / {err_count}")
@@ -449,8 +907,7 @@ async def status_command(interaction: discord.Interaction):
 
 @tree.command(name="admin-check", description="管理者権限を確認")
 async def admin_check_command(interaction: discord.Interaction):
-    admin_ids = config.get("admin_user_id", [])
-    if interaction.user.id in admin_ids:
+    if config.is_admin(interaction.user.id):
         embed = discord.Embed(title="✅ 登録されています。", color=0x2ecc71)
         embed.add_field(name="ID", value=interaction.user.id, inline=False)
         embed.add_field(name="", value="管理者リストに登録されています。\n管理者専用コマンドの使用が許可されています。", inline=False)
@@ -481,38 +938,22 @@ async def report_command(interaction: discord.Interaction, type: str):
 
     await interaction.response.defer()
 
-    target_channel_id = config.get("netatwi_channel_id")
-    trigger_emoji = config.get("reaction_trigger", "🇳").strip()
-    channel = client.get_channel(target_channel_id)
+    channel = config.channel("netatwi")
 
     if not channel:
         await interaction.followup.send("ネタツイ用のチャンネルが見つかりません。")
         return
 
-    # ユーザーごとの集計
-    user_counts = {}
-    async for msg in channel.history(limit=None):
-        if msg.author.bot: continue
-        
-        is_netatwi = False
-        for reaction in msg.reactions:
-            r_str = str(reaction.emoji)
-            if r_str == trigger_emoji or r_str == "🇳" or "regional_indicator_n" in r_str:
-                # 最小リアクション数のチェック
-                if reaction.count >= config.get("min_reaction_count", 1):
-                    is_netatwi = True
-                    break
-        
-        if is_netatwi:
-            username = msg.author.display_name
-            user_counts[username] = user_counts.get(username, 0) + 1
+    # ユーザーごとの集計（直近にスキャン済みならストアだけで集計する。収集中ならその結果を待つ）
+    await collect_netatwi_section(max_age=config.netatwi_scan_ttl)
+    user_counts = netatwi_store.author_counts(channel.id)
 
     if not user_counts:
         await interaction.followup.send("集計対象となるネタツイが見つかりませんでした。")
         return
 
-    # グラフ作成
-    chart_buf = create_netatwi_pie_chart(user_counts)
+    # グラフ作成（描画はワーカースレッドで行い、同じ集計ならキャッシュを返す）
+    chart_buf = await get_chart_renderer().netatwi_pie(user_counts)
     file = discord.File(chart_buf, filename="netatwi_report.png")
 
     embed = discord.Embed(
@@ -527,9 +968,67 @@ async def report_command(interaction: discord.Interaction, type: str):
 
 # --- 3. イベントハンドラ ---
 
+async def backfill_intros(channel):
+    """
+    自己紹介チャンネルをチェックポイント以降だけ古い順に取り込む（初回は全履歴）。
+    途中で止まっても次回はチェックポイントから再開する。
+    """
+    checkpoints = dict(user_intros.meta.get("backfill", {}))
+    last_id = checkpoints.get(str(channel.id))
+    after = discord.Object(id=last_id) if last_id else None
+    count = scanned = 0
+    async for msg in channel.history(limit=None, after=after, oldest_first=True):
+        scanned += 1
+        if msg.author != client.user and "名前" in msg.content:
+            intro_data = parse_intro(msg.content)
+            # 古い順に読むので、同じユーザーは最新の自己紹介で上書きされる
+            if intro_data.get("name", "未設定") != "未設定":
+                if user_intros.put(msg.author.id, intro_data, aliases=[msg.author.display_name, msg.author.name, intro_data["name"]]):
+                    count += 1
+        checkpoints[str(channel.id)] = msg.id
+        if scanned % HISTORY_PAGE_SIZE == 0:
+            user_intros.set_meta("backfill", dict(checkpoints))
+            user_intros.schedule_save()
+    record_history_scan("intro_backfill", scanned)
+    if scanned:
+        user_intros.set_meta("backfill", checkpoints)
+        user_intros.schedule_save()
+    logging.info(f"Imported {count} introductions from history. (scanned {scanned} new messages)")
+    return count
+
+def start_intro_backfill():
+    """過去の自己紹介の取り込みをバックグラウンドで開始する（実行中なら何もしない）"""
+    global intro_backfill_task
+    if intro_backfill_task and not intro_backfill_task.done():
+        return
+    intro_channel = config.channel("intro")
+    if not intro_channel:
+        return
+    logging.info("Scanning existing introductions...")
+    intro_backfill_task = asyncio.create_task(backfill_intros(intro_channel))
+    intro_backfill_task.add_done_callback(
+        lambda t: t.cancelled() or t.exception() is None or logging.error(f"Intro backfill error: {t.exception()}")
+    )
+
+def on_event_loop(func):
+    """
+    AsyncIOScheduler は通常の関数をスレッドプールで実行する。
+    ハンドラと同じ dict を読み書きするジョブは async 関数に包んで、イベントループ上で実行する。
+    """
+    async def job():
+        func()
+    job.__name__ = func.__name__
+    return job
+
 @client.event
 async def on_ready():
+    global metrics_server, scheduler
     logging.info(f'Logged in as {client.user} (ID: {client.user.id})')
+    # 再接続でチャンネルのキャッシュが作り直されることがあるので、覚えていたものは引き直す
+    config.forget_channels()
+    first_ready = not any(phase == "ready" for phase, _ in startup_timeline)
+    if first_ready:
+        mark_startup("ready")
     
     # スラッシュコマンド同期
     try:
@@ -537,34 +1036,38 @@ async def on_ready():
         logging.info(f"Synced {len(synced)} command(s)")
     except Exception as e:
         logging.error(f"Command sync error: {e}")
+
+    if first_ready:
+        mark_startup("commands_synced")
+        logging.info("Startup timeline: " + " → ".join(f"{phase} {t:.2f}s" for phase, t in startup_timeline))
+        for phase, t in startup_timeline:
+            metrics.observe("startup_phase_seconds", t, phase=phase)
     
-    # スケジューラー開始
-    scheduler = AsyncIOScheduler()
-    scheduler.add_job(sync_git_repository, 'interval', minutes=10)
-    scheduler.add_job(collect_netatwi_section, 'interval', minutes=60)
-    scheduler.add_job(scheduled_restart, 'interval', weeks=1)
-    scheduler.start()
-
-    # --- 既存の自己紹介をインポートする処理 ---
-    intro_channel_id = config.get("intro_channel_id")
-    count = 0
-    if intro_channel_id:
-        intro_channel = client.get_channel(intro_channel_id)
-        if intro_channel:
-            logging.info("Scanning existing introductions...")
-            # 過去のメッセージを200件（必要に応じて増減）取得
-            async for msg in intro_channel.history(limit=200):
-                if msg.author == client.user: continue
-                if "名前" in msg.content:
-                    intro_data = parse_intro(msg.content)
-                    if intro_data["name"] != "未設定":
-                        # 既存データと重複しても最新のもので更新
-                        user_intros[msg.author.display_name] = intro_data
-                        user_intros[msg.author.name] = intro_data
-                        user_intros[intro_data["name"]] = intro_data
-                        count += 1
-            save_intro_data()
-            logging.info(f"Imported {count} introductions from history.")
+    # スケジューラー開始（再接続で on_ready が再度呼ばれてもジョブを重複登録しない）
+    if scheduler is None:
+        scheduler = AsyncIOScheduler()
+        scheduler.add_job(sync_git_repository, 'interval', minutes=10)
+        # ネタツイはイベントでライブ更新するので、定期スキャンは取りこぼしの修復用（既定 6 時間ごと）
+        scheduler.add_job(collect_netatwi_section, 'interval', minutes=config.netatwi_scan_interval)
+        # 停止中に取りこぼしたイベントは起動直後の差分スキャンで補う
+        scheduler.add_job(collect_netatwi_section)
+        scheduler.add_job(scheduled_restart, 'interval', weeks=1)
+        scheduler.add_job(on_event_loop(save_shuffle_decks), 'interval', minutes=1)
+        scheduler.add_job(on_event_loop(refresh_log_rollup), 'interval', minutes=5)
+        scheduler.add_job(on_event_loop(metrics.save), 'interval', minutes=1)
+        scheduler.start()
+
+    # メトリクスの HTTP エンドポイント（config.json の metrics_port を指定した場合のみ）
+    metrics_port = config.metrics_port
+    if metrics_port and metrics_server is None:
+        try:
+            metrics_server = await metrics.serve("127.0.0.1", metrics_port)
+            logging.info(f"Metrics endpoint: http://127.0.0.1:{metrics_port}/metrics")
+        except Exception as e:
+            logging.error(f"Failed to start metrics endpoint: {e}")
+
+    # --- 既存の自己紹介をインポートする処理（バックグラウンドで差分のみ） ---
+    start_intro_backfill()
 
     # 起動通知の送信
     utc_tz = timezone.utc
@@ -572,9 +1075,8 @@ async def on_ready():
     now_utc = datetime.now(utc_tz)
     now_jst = datetime.now(jst_tz)
 
-    sys_log_id = config.get("system_log_channel_id")
-    if sys_log_id:
-        sys_channel = client.get_channel(sys_log_id)
+    if config.system_log_channel_id:
+        sys_channel = config.channel("system_log")
         if sys_channel:
             if os.path.exists("scheduled_restart.marker"):
                 title_text = "再起動しました！ (定期スケジュール)"
@@ -589,7 +1091,7 @@ async def on_ready():
 
             embed = discord.Embed(title=title_text, color=0x2ecc71, timestamp=now_utc)
             embed.add_field(name="ステータス", value="✅ 正常稼働中", inline=True)
-            embed.add_field(name="過去ログ同期", value=f"✅ {count}件インポート済み", inline=True)
+            embed.add_field(name="過去ログ同期", value="🔄 バックグラウンドで実行中", inline=True)
             embed.add_field(name="JST (日本標準時)", value=f"`{now_jst.strftime('%Y-%m-%d %H:%M:%S')}`", inline=False)
             embed.add_field(name="", value=desc_text, inline=False)
             await sys_channel.send(embed=embed)
@@ -602,42 +1104,27 @@ async def generate_monthly_report(interaction: discord.Interaction):
         # 過去30日間を対象
         days_30 = [(now_dt - timedelta(days=i)).strftime('%Y-%m-%d') for i in range(30)]
         
-        stats_daily = {day: {"OK": 0, "ERR": 0, "WARN": 0, "REQ": 0, "RES": 0} for day in days_30}
-        info_count, err_count, warn_count = 0, 0, 0
-        response_count = 0 
-        trigger_stats = {} 
-
-        # --- 1. ログファイルの解析 ---
-        if os.path.exists(LOG_FILE):
-            with open(LOG_FILE, "r", encoding="utf-8") as f:
-                for line in f:
-                    log_date = line[:10]
-                    if log_date in stats_daily:
-                        # ログレベル集計
-                        if "[INFO]" in line:
-                            info_count += 1
-                            stats_daily[log_date]["OK"] += 1
-                            if "by " in line: # ユーザーからのリクエストとみなす
-                                stats_daily[log_date]["REQ"] += 1
-                        elif "[ERROR]" in line or "[CRITICAL]" in line:
-                            err_count += 1
-                            stats_daily[log_date]["ERR"] += 1
-                        elif "[WARNING]" in line:
-                            warn_count += 1
-                            stats_daily[log_date]["WARN"] += 1
-                        
-                        # 応答解析
-                        if "Match: '" in line:
-                            response_count += 1
-                            stats_daily[log_date]["RES"] += 1
-                            try:
-                                t_name = line.split("Match: '")[1].split("'")[0]
-                                trigger_stats[t_name] = trigger_stats.get(t_name, 0) + 1
-                            except: pass
+        # --- 1. ログレベルの日別集計（追記分だけを読み込んで更新） ---
+        rollup = get_log_rollup()
+        rollup.refresh()
+        totals = rollup.totals(days_30)
+        info_count, err_count, warn_count = totals["OK"], totals["ERR"], totals["WARN"]
+
+        # --- 2. リクエスト・応答はメトリクスの日別カウンタから集計 ---
+        stats_daily = {}
+        for day in days_30:
+            d = rollup.day(day)
+            stats_daily[day] = {
+                "OK": d["OK"], "ERR": d["ERR"], "WARN": d["WARN"],
+                "REQ": metrics.daily_sum("requests_total", [day]),
+                "RES": metrics.daily_sum("trigger_hits_total", [day]),
+            }
+        replies_sent = sum(d["RES"] for d in stats_daily.values())
+        trigger_stats = metrics.daily_by_label("trigger_hits_total", "trigger", days_30)
 
         total_req = sum(d["REQ"] for d in stats_daily.values())
 
-        # --- 2. 詳細レポートファイルの生成 ---
+        # --- 3. 詳細レポートファイルの生成 ---
         report_filename = f"Detailed_Report_{now_dt.strftime('%Y%m%d_%H%M%S')}.txt"
         with open(report_filename, "w", encoding="utf-8") as rf:
             rf.write(f"=== DISCORD BOT DETAILED MONTHLY REPORT ({now_dt.strftime('%Y/%m')}) ===\n")
@@ -648,14 +1135,7 @@ async def generate_monthly_report(interaction: discord.Interaction):
                 # 実行ファイルの絶対パスからディレクトリを取得
                 current_dir = os.path.dirname(os.path.abspath(__file__))
                 
-                git_res = subprocess.run(
-                    ["git", "-c", "safe.directory=*", "rev-parse", "--short", "HEAD"],
-                    capture_output=True,
-                    text=True,
-                    cwd=current_dir, # ここを動的なパスに変更
-                    check=True
-                )
-                git_ver = git_res.stdout.strip()
+                git_ver = (await run_git("rev-parse", "--short", "HEAD", cwd=current_dir)).strip()
             except subprocess.CalledProcessError as e:
                 # エラー内容をログに詳しく出す（デバッグ用）
                 logging.error(f"Git subprocess error: {e.stderr}")
@@ -680,7 +1160,7 @@ async def generate_monthly_report(interaction: discord.Interaction):
             except Exception:
                 pass
 
-            rf.write(f"Total Response Variations: {sum(len(v) for v in cached_responses.values())}\n")
+            rf.write(f"Total Response Variations: {response_corpus.total()}\n")
             rf.write(f"Total User Intros: {len(user_intros)}\n\n")
 
             rf.write("[ALL TRIGGER STATISTICS]\n")
@@ -688,6 +1168,17 @@ async def generate_monthly_report(interaction: discord.Interaction):
             for k, v in sorted_all_triggers:
                 rf.write(f"- {k}: {v} times\n")
             
+            rf.write("\n[LATENCY]\n")
+            for label, name, labels in (
+                ("Message handling", "message_handle_seconds", {}),
+                ("Discord send (reply)", "discord_send_seconds", {"target": "reply"}),
+                ("Discord send (log)", "discord_send_seconds", {"target": "log_channel"}),
+                ("Git sync", "git_sync_seconds", {}),
+            ):
+                hist = metrics.histogram(name, **labels)
+                if hist and hist.count:
+                    rf.write(f"- {label}: n={hist.count} avg={hist.sum / hist.count * 1000:.1f}ms p50<={hist.quantile(0.5) * 1000:.0f}ms p99<={hist.quantile(0.99) * 1000:.0f}ms\n")
+            
             rf.write("\n[DAILY TRANSITION]\n")
             rf.write("Date       | REQ | RES | INFO | WARN | ERR \n")
             rf.write("-" * 45 + "\n")
@@ -695,7 +1186,7 @@ async def generate_monthly_report(interaction: discord.Interaction):
                 d = stats_daily[day]
                 rf.write(f"{day} | {d['REQ']:<3} | {d['RES']:<3} | {d['OK']:<4} | {d['WARN']:<4} | {d['ERR']:<3}\n")
 
-        # --- 3. Discord用Embed（要約）の作成 ---
+        # --- 4. Discord用Embed（要約）の作成 ---
         sorted_top5 = sorted_all_triggers[:5]
         trigger_text = "\n".join([f"• {k}: {v}回" for k, v in sorted_top5]) if sorted_top5 else "データなし"
 
@@ -705,7 +1196,7 @@ async def generate_monthly_report(interaction: discord.Interaction):
             timestamp=now_dt
         )
         embed.add_field(name="🚨 ログ統計", value=f"✅ INFO: {info_count}\n⚠️ WARN: {warn_count}\n❌ ERR: {err_count}", inline=True)
-        embed.add_field(name="📩 通信統計", value=f"📥 受信Req: {total_req}\n📤 総応答数: {response_count}", inline=True)
+        embed.add_field(name="📩 通信統計", value=f"📥 受信Req: {total_req}\n📤 総応答数: {replies_sent}", inline=True)
         embed.add_field(name="", value=f"```text\n{trigger_text}\n```", inline=False)
         embed.add_field(name="📚 自己紹介DB", value=f"📝 登録数: {len(user_intros)}", inline=True)
         embed.add_field(name="⚙️ Git", value=f"\n⚙️ Git: `{git_ver}`", inline=True)
@@ -722,36 +1213,97 @@ async def generate_monthly_report(interaction: discord.Interaction):
         await interaction.followup.send(f"レポート作成失敗: {e}")
         logging.error(f"Monthly report full error: {e}")
 
+# --- ネタツイのライブ更新（定期スキャンを待たずにリアクション・編集・削除を反映） ---
+@client.event
+async def on_raw_reaction_add(payload):
+    await on_netatwi_reaction(payload, 1)
+
+@client.event
+async def on_raw_reaction_remove(payload):
+    await on_netatwi_reaction(payload, -1)
+
+@client.event
+async def on_raw_reaction_clear(payload):
+    if payload.channel_id == config.netatwi_channel_id:
+        metrics.inc("netatwi_events_total", event="reaction_clear", source="event")
+        update_netatwi_entries(payload.channel_id, [(payload.message_id, None)])
+
+@client.event
+async def on_raw_reaction_clear_emoji(payload):
+    if payload.channel_id == config.netatwi_channel_id and is_netatwi_emoji(payload.emoji):
+        metrics.inc("netatwi_events_total", event="reaction_clear", source="event")
+        update_netatwi_entries(payload.channel_id, [(payload.message_id, None)])
+
+@client.event
+async def on_raw_message_edit(payload):
+    if payload.channel_id != config.netatwi_channel_id or "content" not in payload.data:
+        return
+    # 認定済みのネタツイだけ本文を差し替える（未認定のメッセージの編集は関係ない）
+    stored = netatwi_store.get(payload.message_id)
+    if stored is None:
+        return
+    metrics.inc("netatwi_events_total", event="edit", source="event")
+    content = (payload.data["content"] or "").strip()
+    update_netatwi_entries(payload.channel_id, [(payload.message_id, dict(stored, content=content) if content else None)])
+
+@client.event
+async def on_raw_message_delete(payload):
+    if payload.channel_id == config.netatwi_channel_id:
+        metrics.inc("netatwi_events_total", event="delete", source="event")
+        update_netatwi_entries(payload.channel_id, [(payload.message_id, None)])
+
+@client.event
+async def on_raw_bulk_message_delete(payload):
+    if payload.channel_id == config.netatwi_channel_id:
+        metrics.inc("netatwi_events_total", len(payload.message_ids), event="delete", source="event")
+        update_netatwi_entries(payload.channel_id, [(message_id, None) for message_id in payload.message_ids])
+
 @client.event
 async def on_message(message):
-    global config, user_intros
     if message.author == client.user: return
+    with metrics.timer("message_handle_seconds"):
+        await handle_message(message)
+
+@client.event
+async def on_app_command_completion(interaction: discord.Interaction, command):
+    metrics.inc("requests_total", kind="slash")
+    metrics.inc("slash_commands_total", command=command.name, status="ok")
+    metrics.observe("slash_command_seconds", (discord.utils.utcnow() - interaction.created_at).total_seconds(), command=command.name)
+
+@tree.error
+async def on_app_command_error(interaction: discord.Interaction, error):
+    command_name = interaction.command.name if interaction.command else "unknown"
+    metrics.inc("slash_commands_total", command=command_name, status="error")
+    metrics.observe("slash_command_seconds", (discord.utils.utcnow() - interaction.created_at).total_seconds(), command=command_name)
+    logging.error(f"Slash command error in /{command_name}: {error}")
+
+async def handle_message(message):
+    if message.author == client.user: return
+    # 処理の途中で再読み込みされても同じ設定を見続けるよう、最初に1回だけ参照する
+    settings = config
 
     # 管理者判定フラグ
-    is_admin = message.author.id in admin_ids
+    is_admin = settings.is_admin(message.author.id)
 
     content = message.content.strip()
 
     # --- 自己紹介チャンネルの監視と自動保存 ---
-    intro_channel_id = config.get("intro_channel_id")
-    if intro_channel_id and message.channel.id == intro_channel_id:
+    if settings.intro_channel_id and message.channel.id == settings.intro_channel_id:
         if "【名前" in content: # テンプレートが含まれているか簡易チェック
             intro_data = parse_intro(content)
-            # ユーザー名とIDをキーにして保存（検索しやすくするため）
-            user_intros[message.author.display_name] = intro_data
-            user_intros[str(message.author.id)] = intro_data
-            save_intro_data()
+            # ユーザーIDをキーに1件保存し、名前は別名として登録（検索しやすくするため）
+            save_intro(message.author, intro_data)
             logging.info(f"Intro saved for {message.author.display_name}")
             await message.add_reaction("✅") # 保存完了の合図
 
     # --- 許可されたチャンネルでのコマンド処理 ---
-    allowed_ids = config.get("allowed_channels", [])
-    if message.channel.id not in allowed_ids: return
+    if not settings.is_allowed_channel(message.channel.id): return
 
     
 
     # !user-info [ユーザー名 or メンション]
     if content.startswith("!user-info"):
+        metrics.inc("requests_total", kind="command")
         target_name = content.replace("!user-info", "").strip()
         if not target_name:
             await message.channel.send("⚠️ 検索したいユーザー名(サーナー内の表示名)を入力してください。例: `!user-info やま`")
@@ -759,11 +1311,18 @@ async def on_message(message):
         
         # メンションからIDを抽出
         match = re.match(r'<@!?(\d+)>', target_name)
+        other_candidates = []
         if match:
             user_id = match.group(1)
             info = user_intros.get(user_id)
         else:
             info = user_intros.get(target_name)
+            if info is None:
+                # 表記ゆれ（全角/半角・カタカナ/ひらがな）・前方一致・あいまい一致で探す
+                candidates = user_intros.search(target_name)
+                if candidates:
+                    info = user_intros.get(candidates[0][0])
+                    other_candidates = [user_intros.get(c[0], {}).get("name", c[2]) for c in candidates[1:]]
 
         if info:
             embed = discord.Embed(title=f"👤 {info.get('name', target_name)} さんの自己紹介", color=0x3498db)
@@ -771,12 +1330,20 @@ async def on_message(message):
             embed.add_field(name="年齢", value=info.get("age", "未設定"), inline=True)
             embed.add_field(name="趣味・好きなこと", value=info.get("like", "未設定"), inline=False)
             embed.add_field(name="ひとこと", value=info.get("message", "未設定"), inline=False)
+            # config.json の intro_fields で追加した項目は見出しのラベルで表示する
+            for field, labels in intro_parser.fields.items():
+                if field not in INTRO_EMBED_FIELDS and field in info:
+                    label = labels if isinstance(labels, str) else labels[0]
+                    embed.add_field(name=label, value=info[field], inline=False)
+            if other_candidates:
+                embed.set_footer(text="他の候補: " + " / ".join(other_candidates))
             await message.channel.send(embed=embed)
         else:
             await message.channel.send(f"🔍 `{target_name}` さんの自己紹介データは見つかりませんでした。")
         return
 
     if content == "!help":
+        metrics.inc("requests_total", kind="command")
         embed = discord.Embed(title="📜 コマンドヘルプ", color=0x34495e)
         embed.add_field(name="!user-info [名前 or @メンション]", value="自己紹介情報を検索", inline=False)
         embed.add_field(name="!status", value="統計と直近ログを表示", inline=False)
@@ -784,7 +1351,7 @@ async def on_message(message):
         embed.add_field(name="!reload", value="設定とGit同期を手動実行", inline=False)
         embed.add_field(name="!logreset", value="ログファイルをリセット", inline=False)
         embed.add_field(name="!restart", value="ボットを再起動（管理者のみ）", inline=False)
-        github_url = config.get("github_url", "https://github.com/")
+        github_url = settings.github_url
         embed.add_field(name="💻 GitHub", value=f"[リポジトリ]({github_url})", inline=False)
         if is_admin:
             embed.set_footer(text="INFO：あなたのユーザーIDから管理権限を確認しました。\n管理者専用コマンドの使用が許可されています。")
@@ -792,37 +1359,45 @@ async def on_message(message):
         return
     
     if content == "!logreset":
+        metrics.inc("requests_total", kind="command")
         with open(LOG_FILE, "w", encoding="utf-8") as f:
             f.write(f"{datetime.now()} [INFO] Log reset\n")
+        get_log_rollup().reset()
         await message.channel.send("🧹 ログをリセットしました。")
         return
 
-    if content == "!collect-netatwi":
+    if content in ("!collect-netatwi", "!collect-netatwi full"):
+        metrics.inc("requests_total", kind="command")
         if is_admin:
-            await message.channel.send("🔄 ネタツイ収集中...")
-            await collect_netatwi_section()
+            if jobs.running("netatwi"):
+                await message.channel.send("⏳ 実行中のネタツイ収集に合流します...")
+            else:
+                await message.channel.send("🔄 ネタツイ収集中...")
+            await collect_netatwi_section(full=content.endswith("full"))
             await message.channel.send("✅ 収集完了。")
         else:
             await message.channel.send("⚠️ 権限がありません。")
         return
 
     # --- 既存: 自動応答ロジック ---
-    for trigger, responses in cached_responses.items():
-        if trigger in content:
-            raw_response = get_shuffled_response(trigger)
-            final_response = raw_response.replace("[userName]", message.author.display_name)
+    # 1回の走査でファイル順の最初のトリガーを求める
+    trigger = trigger_matcher.find_first(content)
+    if trigger is not None:
+        metrics.inc("requests_total", kind="trigger")
+        # 連投・スパムは応答せず、山札も進めない
+        verdict = response_limiter.check(message.channel.id, message.author.id, trigger)
+        if verdict != "ok":
+            metrics.inc("responses_suppressed_total", reason=verdict)
+            return
+        metrics.inc("trigger_hits_total", trigger=trigger)
+        final_response = render_response(get_shuffled_response(trigger), message)
+        with metrics.timer("discord_send_seconds", target="reply"):
             await message.channel.send(final_response)
-            logging.info(f"Match: '{trigger}' by {message.author}")
-
-            log_channel_id = config.get("log_channel_id")
-            if log_channel_id:
-                log_channel = client.get_channel(log_channel_id)
-                if log_channel:
-                    log_embed = discord.Embed(title="✨ 自動応答ログ", color=0x3498db)
-                    log_embed.add_field(name="実行者", value=message.author.mention, inline=True)
-                    log_embed.add_field(name="トリガー", value=f"`{trigger}`", inline=True)
-                    await log_channel.send(embed=log_embed)
-            break
+        logging.info(f"Match: '{trigger}' by {message.author} (scan: {trigger_matcher.last_cost} steps)")
+
+        # ログチャンネルへは数秒ごとにまとめて送る（返信はログ送信を待たない）
+        if settings.log_channel_id:
+            log_publisher.publish(message.author.mention, trigger)
 
 if TOKEN:
     client.run(TOKEN)
\ No newline at end of file
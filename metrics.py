@@ -0,0 +1,193 @@
+"""プロセス内メトリクス（カウンタ / レイテンシヒストグラム）"""
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+
+# 秒単位のバケット境界（Prometheus のデフォルトに近い値）
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_key(name, label_key, extra=()):
+    pairs = list(label_key) + list(extra)
+    if not pairs:
+        return name
+    body = ",".join(f'{k}="{_escape(v)}"' for k, v in pairs)
+    return f"{name}{{{body}}}"
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 最後は +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def quantile(self, q):
+        """バケット境界から分位点を概算する"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return self.buckets[i] if i < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def to_dict(self):
+        return {"counts": self.counts, "sum": self.sum, "count": self.count}
+
+    @classmethod
+    def from_dict(cls, data):
+        h = cls()
+        if len(data.get("counts", [])) == len(h.counts):
+            h.counts = list(data["counts"])
+            h.sum = data.get("sum", 0.0)
+            h.count = data.get("count", 0)
+        return h
+
+
+class MetricsRegistry:
+    """
+    自動応答やコマンドの処理箇所から直接カウンタ・ヒストグラムを更新する。
+    カウンタは日別にも積み上げ、スナップショットファイルに保存して再起動後も引き継ぐ。
+    """
+
+    def __init__(self, snapshot_path=None, keep_days=400):
+        self.snapshot_path = snapshot_path
+        self.keep_days = keep_days
+        self.counters = {}
+        self.histograms = {}
+        self.daily = {}
+        self.started_at = time.time()
+        self.load()
+
+    # --- 更新 ---
+    def inc(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        self.counters[key] = self.counters.get(key, 0) + value
+        day = self.daily.setdefault(datetime.now().strftime('%Y-%m-%d'), {})
+        day[key] = day.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = (name, _label_key(labels))
+        hist = self.histograms.get(key)
+        if hist is None:
+            hist = self.histograms[key] = Histogram()
+        hist.observe(seconds)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    # --- 参照 ---
+    def histogram(self, name, **labels):
+        return self.histograms.get((name, _label_key(labels)))
+
+    def daily_sum(self, name, day_keys):
+        """指定日のカウンタ合計（ラベルはすべて合算）"""
+        total = 0
+        for day_key in day_keys:
+            for (n, _), value in self.daily.get(day_key, {}).items():
+                if n == name:
+                    total += value
+        return total
+
+    def daily_by_label(self, name, label, day_keys):
+        """指定日のカウンタをラベル値ごとに合算する（例: トリガー別の応答数）"""
+        result = {}
+        for day_key in day_keys:
+            for (n, label_key), value in self.daily.get(day_key, {}).items():
+                if n != name:
+                    continue
+                label_value = dict(label_key).get(label)
+                if label_value is not None:
+                    result[label_value] = result.get(label_value, 0) + value
+        return result
+
+    # --- 出力 ---
+    def render_prometheus(self):
+        """Prometheus のテキスト形式で出力する"""
+        lines = []
+        for (name, label_key), value in sorted(self.counters.items()):
+            lines.append(f"{_format_key(name, label_key)} {value}")
+        for (name, label_key), hist in sorted(self.histograms.items(), key=lambda kv: kv[0]):
+            cumulative = 0
+            for bound, n in zip(list(hist.buckets) + ["+Inf"], hist.counts):
+                cumulative += n
+                lines.append(f"{_format_key(name + '_bucket', label_key, [('le', bound)])} {cumulative}")
+            lines.append(f"{_format_key(name + '_sum', label_key)} {hist.sum}")
+            lines.append(f"{_format_key(name + '_count', label_key)} {hist.count}")
+        lines.append(f"process_start_time_seconds {self.started_at}")
+        return "\n".join(lines) + "\n"
+
+    async def serve(self, host, port):
+        """/metrics を返す HTTP エンドポイントを起動する（localhost 向け）"""
+        from aiohttp import web
+
+        async def handle(request):
+            return web.Response(text=self.render_prometheus(), content_type="text/plain")
+
+        app = web.Application()
+        app.router.add_get("/metrics", handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        return runner
+
+    # --- 永続化 ---
+    def save(self):
+        if not self.snapshot_path:
+            return
+        if len(self.daily) > self.keep_days:
+            for day_key in sorted(self.daily)[:len(self.daily) - self.keep_days]:
+                del self.daily[day_key]
+        data = {
+            "saved_at": time.time(),
+            "counters": [[n, dict(lk), v] for (n, lk), v in self.counters.items()],
+            "histograms": [[n, dict(lk), h.to_dict()] for (n, lk), h in self.histograms.items()],
+            "daily": {d: [[n, dict(lk), v] for (n, lk), v in c.items()] for d, c in self.daily.items()},
+        }
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.snapshot_path)
+
+    def load(self):
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.counters = {(n, _label_key(lb)): v for n, lb, v in data.get("counters", [])}
+        self.histograms = {(n, _label_key(lb)): Histogram.from_dict(h) for n, lb, h in data.get("histograms", [])}
+        self.daily = {
+            d: {(n, _label_key(lb)): v for n, lb, v in entries}
+            for d, entries in data.get("daily", {}).items()
+        }
@@ -0,0 +1,158 @@
+"""ネタツイ収集結果のローカルストア (SQLite)"""
+import sqlite3
+from datetime import datetime
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS netatwi (
+    message_id     INTEGER PRIMARY KEY,
+    channel_id     INTEGER NOT NULL,
+    author_id      INTEGER,
+    author_name    TEXT,
+    content        TEXT NOT NULL,
+    reaction_count INTEGER NOT NULL DEFAULT 0,
+    created_at     TEXT,
+    updated_at     TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_netatwi_channel ON netatwi(channel_id, message_id);
+CREATE INDEX IF NOT EXISTS idx_netatwi_author ON netatwi(channel_id, author_id);
+CREATE INDEX IF NOT EXISTS idx_netatwi_content ON netatwi(content);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    channel_id      INTEGER PRIMARY KEY,
+    last_message_id INTEGER
+);
+"""
+
+
+class NetatwiStore:
+    """
+    メッセージIDをキーにネタツイを保持する。
+    追加・削除・検索は変更行の分だけで済み、responses.yml 全体を書き直す必要がない。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def commit(self):
+        self.conn.commit()
+
+    def rollback(self):
+        self.conn.rollback()
+
+    # --- チェックポイント ---
+    def get_checkpoint(self, channel_id):
+        row = self.conn.execute(
+            "SELECT last_message_id FROM checkpoints WHERE channel_id = ?", (channel_id,)
+        ).fetchone()
+        return row["last_message_id"] if row else None
+
+    def scanned(self):
+        """いずれかのチャンネルを一度でもスキャンし終えているか（チェックポイントの行があるか）"""
+        return self.conn.execute("SELECT 1 FROM checkpoints LIMIT 1").fetchone() is not None
+
+    def set_checkpoint(self, channel_id, last_message_id):
+        self.conn.execute(
+            "INSERT INTO checkpoints(channel_id, last_message_id) VALUES (?, ?) "
+            "ON CONFLICT(channel_id) DO UPDATE SET last_message_id = excluded.last_message_id",
+            (channel_id, last_message_id),
+        )
+
+    # --- 行単位の更新 ---
+    def _has_content(self, content):
+        return self.conn.execute("SELECT 1 FROM netatwi WHERE content = ? LIMIT 1", (content,)).fetchone() is not None
+
+    def upsert(self, channel_id, entry):
+        """
+        エントリを追加・更新する。
+        戻り値: (新たにプールへ入った本文 or None, プールから消えた本文 or None)
+        """
+        row = self.conn.execute(
+            "SELECT content FROM netatwi WHERE message_id = ?", (entry["message_id"],)
+        ).fetchone()
+        old_content = row["content"] if row else None
+        added = None if old_content == entry["content"] or self._has_content(entry["content"]) else entry["content"]
+
+        self.conn.execute(
+            "INSERT INTO netatwi(message_id, channel_id, author_id, author_name, content, reaction_count, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(message_id) DO UPDATE SET author_id = excluded.author_id, author_name = excluded.author_name, "
+            "content = excluded.content, reaction_count = excluded.reaction_count, updated_at = excluded.updated_at",
+            (
+                entry["message_id"], channel_id, entry.get("author_id"), entry.get("author_name"),
+                entry["content"], entry.get("count", 0), entry.get("created_at"), datetime.now().isoformat(),
+            ),
+        )
+
+        removed = None
+        if old_content is not None and old_content != entry["content"] and not self._has_content(old_content):
+            removed = old_content
+        return added, removed
+
+    def delete(self, message_id):
+        """エントリを削除する。プールから本文が消えた場合はその本文を返す"""
+        row = self.conn.execute("SELECT content FROM netatwi WHERE message_id = ?", (message_id,)).fetchone()
+        if not row:
+            return None
+        self.conn.execute("DELETE FROM netatwi WHERE message_id = ?", (message_id,))
+        return None if self._has_content(row["content"]) else row["content"]
+
+    def clear_channel(self, channel_id):
+        self.conn.execute("DELETE FROM netatwi WHERE channel_id = ?", (channel_id,))
+        self.conn.execute("DELETE FROM checkpoints WHERE channel_id = ?", (channel_id,))
+
+    # --- 検索 ---
+    def message_ids_between(self, channel_id, low, high):
+        rows = self.conn.execute(
+            "SELECT message_id FROM netatwi WHERE channel_id = ? AND message_id BETWEEN ? AND ?",
+            (channel_id, low, high),
+        )
+        return [r["message_id"] for r in rows]
+
+    def get(self, message_id):
+        """1件のエントリを entries() と同じ形の dict で返す（無ければ None）"""
+        row = self.conn.execute(
+            "SELECT message_id, author_id, author_name, content, reaction_count AS count, created_at "
+            "FROM netatwi WHERE message_id = ?",
+            (message_id,),
+        ).fetchone()
+        return dict(row) if row else None
+
+    def entries(self, channel_id):
+        rows = self.conn.execute(
+            "SELECT message_id, author_id, author_name, content, reaction_count AS count, created_at "
+            "FROM netatwi WHERE channel_id = ? ORDER BY message_id",
+            (channel_id,),
+        )
+        return [dict(r) for r in rows]
+
+    def texts(self, channel_id=None):
+        """重複なしの本文をメッセージ順で返す（応答プール用）"""
+        if channel_id is None:
+            rows = self.conn.execute("SELECT content FROM netatwi GROUP BY content ORDER BY MIN(message_id)")
+        else:
+            rows = self.conn.execute(
+                "SELECT content FROM netatwi WHERE channel_id = ? GROUP BY content ORDER BY MIN(message_id)",
+                (channel_id,),
+            )
+        return [r["content"] for r in rows]
+
+    def author_counts(self, channel_id):
+        rows = self.conn.execute(
+            "SELECT COALESCE(author_name, '不明') AS name, COUNT(*) AS n FROM netatwi "
+            "WHERE channel_id = ? GROUP BY author_id ORDER BY n DESC",
+            (channel_id,),
+        )
+        counts = {}
+        for r in rows:
+            counts[r["name"]] = counts.get(r["name"], 0) + r["n"]
+        return counts
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM netatwi").fetchone()[0]
@@ -0,0 +1,118 @@
+"""応答の格納形式（重複なしの文字列表と、トリガーごとの番号配列）"""
+import sys
+from array import array
+
+
+def new_deck(size=0):
+    """山札（セクション内の位置の配列）を作る。list の代わりに 4 バイト整数の array を使う"""
+    return array("I", range(size))
+
+
+class ResponseCorpus:
+    """
+    応答文は strings に1回ずつだけ持ち、各トリガーのセクションは strings への番号 (array) で持つ。
+    同じ応答が複数のトリガーにあっても文字列は1つで済む。
+    応答文 -> 番号の索引は組み立て・追加の間だけ作って捨てる（応答時には使わないので常駐させない）。
+    セクションから外れた文字列は表に残るので、再読み込みのたびに rebuild() で作り直す。
+    """
+
+    def __init__(self):
+        self.strings = []   # 番号 -> 応答文
+        self.sections = {}  # トリガー -> array("I") の番号列（ファイル順）
+        self._ids = None    # 応答文 -> 番号（組み立て中だけ）
+
+    # --- 参照 ---
+    def __contains__(self, trigger):
+        return trigger in self.sections
+
+    def __iter__(self):
+        return iter(self.sections)
+
+    def triggers(self):
+        return list(self.sections)
+
+    def size(self, trigger):
+        return len(self.sections[trigger])
+
+    def text(self, trigger, position):
+        return self.strings[self.sections[trigger][position]]
+
+    def texts(self, trigger):
+        """セクションの応答文を list で返す（保存・比較用。応答時はこれを使わず text() で引く）"""
+        strings = self.strings
+        return [strings[i] for i in self.sections.get(trigger, ())]
+
+    def total(self):
+        """全セクションの応答数（同じ文が複数のトリガーにあれば重複して数える）"""
+        return sum(len(ids) for ids in self.sections.values())
+
+    # --- 更新 ---
+    def _index(self):
+        if self._ids is None:
+            self._ids = {text: i for i, text in enumerate(self.strings)}
+        return self._ids
+
+    def _intern(self, text):
+        ids = self._index()
+        index = ids.get(text)
+        if index is None:
+            index = ids[text] = len(self.strings)
+            self.strings.append(text)
+        return index
+
+    def set_section(self, trigger, texts):
+        self.sections[trigger] = array("I", map(self._intern, texts))
+        self._ids = None
+
+    def extend_unique(self, trigger, texts):
+        """セクションに無い応答だけを末尾に足し、実際に足した応答文の list を返す"""
+        section = self.sections.setdefault(trigger, array("I"))
+        present = set(section)
+        added = []
+        for text in texts:
+            index = self._intern(text)
+            if index not in present:
+                present.add(index)
+                section.append(index)
+                added.append(text)
+        self._ids = None
+        return added
+
+    def remove(self, trigger, texts):
+        """texts に含まれる応答をセクションから外す（文字列表からは次の rebuild() で消える）"""
+        ids = self._index()
+        drop = {ids[t] for t in texts if t in ids}
+        self._ids = None
+        section = self.sections.get(trigger)
+        if section is None or not drop:
+            return
+        self.sections[trigger] = array("I", (i for i in section if i not in drop))
+
+    def rebuild(self, sections):
+        """
+        sections ({トリガー: 応答文の並び}) から新しいコーパスを作る。
+        値が None のトリガーはこのコーパスの同名セクションを写す（文字列オブジェクトは使い回す）。
+        """
+        corpus = ResponseCorpus()
+        strings = self.strings
+        for trigger, texts in sections.items():
+            if texts is None:
+                texts = [strings[i] for i in self.sections[trigger]]
+            corpus.sections[trigger] = array("I", map(corpus._intern, texts))
+        corpus._ids = None
+        return corpus
+
+    # --- 計測 ---
+    def memory_usage(self):
+        """文字列表・索引・番号配列のおおよそのバイト数"""
+        total = sys.getsizeof(self.strings) + sys.getsizeof(self.sections)
+        total += sum(sys.getsizeof(s) for s in self.strings)
+        total += sum(sys.getsizeof(ids) for ids in self.sections.values())
+        return total
+
+    def stats(self):
+        return {
+            "unique": len(self.strings),
+            "references": self.total(),
+            "bytes": self.memory_usage(),
+        }
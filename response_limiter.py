@@ -0,0 +1,101 @@
+"""自動応答の流量制限（トークンバケット + 同じトリガーの連投のまとめ）"""
+import time
+from collections import OrderedDict
+
+
+# config.json の response_limits で指定しなかった項目の既定値（指定した項目だけ上書きされる）
+# rate: 1秒あたりに回復する回数 / burst: 連続で応答できる回数 / null にするとその範囲は無制限
+DEFAULT_RESPONSE_LIMITS = {
+    "user": {"rate": 0.2, "burst": 3},
+    "channel": {"rate": 1.0, "burst": 5},
+    "trigger": None,
+    "coalesce_seconds": 3.0,
+}
+
+# 範囲名 -> 個別設定のキー
+SCOPES = (("user", "users"), ("channel", "channels"), ("trigger", "triggers"))
+
+
+class ResponseLimiter:
+    """
+    ユーザー・チャンネル・トリガー（チャンネルごと）の3つのトークンバケットを全部通ったときだけ応答する。
+    同じ人が同じチャンネルで同じトリガーを coalesce_seconds 以内に続けた分は、最初の1回の応答にまとめる。
+    （別の人の発言はまとめない。くじなどは人ごとに引けるようにする）
+    バケットは満タンに戻れば不要なので、最終更新が古い順に捨てて使用中のキーの分だけメモリを持つ。
+    """
+
+    def __init__(self, settings=None):
+        self.buckets = {scope: OrderedDict() for scope, _ in SCOPES}  # key -> [tokens, last]
+        self.recent = OrderedDict()  # (channel_id, user_id, trigger) -> まとめる期間の終わり
+        self.configure(settings)
+
+    def configure(self, settings=None):
+        # 書かれていない範囲は既定値のまま。明示的に null を書いた範囲だけ無制限にする
+        self.settings = dict(DEFAULT_RESPONSE_LIMITS, **(settings or {}))
+        self.coalesce_seconds = float(self.settings.get("coalesce_seconds") or 0)
+        # 満タンに戻るまでの最長時間。これより前に触られたバケットは捨ててよい
+        self.ttl = {}
+        for scope, overrides in SCOPES:
+            limits = [self.settings.get(scope)] + list((self.settings.get(overrides) or {}).values())
+            self.ttl[scope] = max((lim["burst"] / lim["rate"] for lim in limits if lim), default=0)
+
+    def _limit(self, scope, overrides, name):
+        per_key = self.settings.get(overrides) or {}
+        if name in per_key:
+            return per_key[name]
+        return self.settings.get(scope)
+
+    def check(self, channel_id, user_id, trigger, now=None):
+        """
+        応答してよいかを判定し、"ok" / "coalesced"（直前の応答にまとめる）/ "cooldown" を返す。
+        "ok" のときだけトークンを消費する。
+        """
+        now = time.monotonic() if now is None else now
+        self._expire(now)
+
+        recent_key = (channel_id, user_id, trigger)
+        if self.recent.get(recent_key, 0) > now:
+            return "coalesced"
+
+        names = {"user": str(user_id), "channel": str(channel_id), "trigger": trigger}
+        keys = {"user": user_id, "channel": channel_id, "trigger": (channel_id, trigger)}
+        taken = []
+        for scope, overrides in SCOPES:
+            limit = self._limit(scope, overrides, names[scope])
+            if not limit:
+                continue
+            bucket = self.buckets[scope].get(keys[scope])
+            if bucket is None:
+                tokens = float(limit["burst"])
+            else:
+                tokens = min(float(limit["burst"]), bucket[0] + (now - bucket[1]) * limit["rate"])
+            if tokens < 1:
+                return "cooldown"
+            taken.append((scope, keys[scope], tokens))
+
+        # すべての範囲で余裕があるときだけまとめて消費する
+        for scope, key, tokens in taken:
+            buckets = self.buckets[scope]
+            buckets[key] = [tokens - 1, now]
+            buckets.move_to_end(key)
+        if self.coalesce_seconds:
+            self.recent[recent_key] = now + self.coalesce_seconds
+            self.recent.move_to_end(recent_key)
+        return "ok"
+
+    def _expire(self, now):
+        for scope, buckets in self.buckets.items():
+            ttl = self.ttl[scope]
+            while buckets:
+                key, (_, last) = next(iter(buckets.items()))
+                if last + ttl > now:
+                    break
+                del buckets[key]
+        while self.recent:
+            key, until = next(iter(self.recent.items()))
+            if until > now:
+                break
+            del self.recent[key]
+
+    def __len__(self):
+        return sum(len(b) for b in self.buckets.values()) + len(self.recent)
@@ -0,0 +1,169 @@
+"""responses.yml のコンパイル済みスナップショット（バイナリ形式・元ファイルの sha256 で照合）"""
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from response_template import PLACEHOLDERS, compile_response
+
+
+MAGIC = b"RSNAP\x00\x01\x00"
+# magic, 元ファイルの sha256, プレースホルダー表のハッシュ, セクション数, 文字列数, 状態数, 遷移数, 文字列領域の文字数
+HEADER = struct.Struct("<8s32s8sIIIII")
+# プレースホルダーの種類が変わったら「固定文」フラグが古くなるので、スナップショットごと作り直す
+SCHEMA = hashlib.sha256("\0".join(sorted(PLACEHOLDERS)).encode("utf-8")).digest()[:8]
+
+
+def _to_bytes(typecode, values):
+    # 配列はリトルエンディアンの 4 バイト整数で持つ（array の "I" / "i" は CPython では 4 バイト）
+    arr = array(typecode, values)
+    if sys.byteorder == "big":
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def _from_bytes(typecode, buf):
+    arr = array(typecode)
+    arr.frombytes(buf)
+    if sys.byteorder == "big":
+        arr.byteswap()
+    return arr
+
+
+class ResponseSnapshot:
+    """
+    スナップショットから復元した内容。
+    sections は responses.yml と同じ {トリガー: [応答, ...]}、tables は TriggerMatcher の表、
+    static_texts はプレースホルダーを含まない（テンプレート変換の要らない）応答の集合。
+    """
+    __slots__ = ("digest", "sections", "tables", "static_texts")
+
+    def __init__(self, digest, sections, tables, static_texts):
+        self.digest = digest
+        self.sections = sections
+        self.tables = tables
+        self.static_texts = static_texts
+
+    @property
+    def triggers(self):
+        return list(self.sections)
+
+
+def snapshot_supported(data):
+    """スナップショットにできるのは {str: [str, ...]} の形だけ（それ以外は毎回 YAML から読む）"""
+    return isinstance(data, dict) and all(
+        isinstance(trigger, str) and isinstance(texts, list) and all(isinstance(t, str) for t in texts)
+        for trigger, texts in data.items()
+    )
+
+
+def write_snapshot(path, digest, data, matcher):
+    """
+    data と構築済みのマッチャーをスナップショットに書き出す（一時ファイル経由で置き換え）。
+    matcher は list(data) と同じトリガー列から作ったものを渡すこと。
+    """
+    goto, fail, best = matcher.tables()
+    triggers = list(data)
+    strings = triggers[:]
+    section_ends = []
+    for texts in data.values():
+        strings.extend(texts)
+        section_ends.append(len(strings))
+    static = bytes(
+        1 if compile_response(text) is None else 0 for text in strings[len(triggers):]
+    )
+
+    offsets = [0]
+    for text in strings:
+        offsets.append(offsets[-1] + len(text))
+    # 遷移の文字もまとめて文字列領域の後ろに置く（状態ごとの終端位置で区切る）
+    edge_ends = []
+    edge_chars = []
+    edge_targets = []
+    for edges in goto:
+        edge_chars.extend(edges.keys())
+        edge_targets.extend(edges.values())
+        edge_ends.append(len(edge_targets))
+    text = "".join(strings) + "".join(edge_chars)
+
+    header = HEADER.pack(
+        MAGIC, bytes.fromhex(digest), SCHEMA,
+        len(triggers), len(strings), len(goto), len(edge_targets), len(text),
+    )
+    parts = [
+        header,
+        _to_bytes("I", offsets),
+        _to_bytes("I", section_ends),
+        static,
+        _to_bytes("I", fail),
+        _to_bytes("i", [-1 if b is None else b for b in best]),
+        _to_bytes("I", edge_ends),
+        _to_bytes("I", edge_targets),
+        text.encode("utf-8"),
+    ]
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(b"".join(parts))
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path, digest):
+    """
+    digest (元ファイルの sha256) と一致するスナップショットを読み込む。
+    無い・古い・壊れている場合は None を返す（呼び出し側で YAML から読み直す）。
+    """
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            return _decode(buf, digest)
+    except (OSError, ValueError, struct.error, UnicodeDecodeError, IndexError):
+        return None
+
+
+def _decode(buf, digest):
+    if len(buf) < HEADER.size:
+        return None
+    magic, source, schema, n_sections, n_strings, n_states, n_edges, text_len = HEADER.unpack_from(buf, 0)
+    # ヘッダーだけ見て古ければ本体には触らない
+    if magic != MAGIC or source != bytes.fromhex(digest) or schema != SCHEMA:
+        return None
+
+    pos = HEADER.size
+
+    def take(typecode, count):
+        nonlocal pos
+        end = pos + 4 * count
+        arr = _from_bytes(typecode, buf[pos:end])
+        pos = end
+        return arr
+
+    offsets = take("I", n_strings + 1)
+    section_ends = take("I", n_sections)
+    static = buf[pos:pos + n_strings - n_sections]
+    pos += n_strings - n_sections
+    fail = take("I", n_states).tolist()
+    best = [None if b < 0 else b for b in take("i", n_states)]
+    edge_ends = take("I", n_states)
+    edge_targets = take("I", n_edges).tolist()
+    text = buf[pos:].decode("utf-8")
+    if len(text) != text_len:
+        return None
+
+    strings = [text[offsets[i]:offsets[i + 1]] for i in range(n_strings)]
+    sections = {}
+    start = n_sections
+    for trigger, end in zip(strings[:n_sections], section_ends):
+        sections[trigger] = strings[start:end]
+        start = end
+    static_texts = frozenset(
+        t for t, flag in zip(strings[n_sections:], static) if flag
+    )
+
+    labels = text[offsets[n_strings]:]
+    goto = []
+    start = 0
+    for end in edge_ends:
+        goto.append(dict(zip(labels[start:end], edge_targets[start:end])))
+        start = end
+    return ResponseSnapshot(digest, sections, (goto, fail, best), static_texts)
@@ -0,0 +1,52 @@
+"""応答テキストのテンプレート（プレースホルダーの事前解析と差し込み）"""
+import re
+
+
+# 応答文中の表記 -> 差し込む値の名前
+PLACEHOLDERS = {
+    "[userName]": "user_name",       # 発言者の表示名
+    "{userName}": "user_name",
+    "{mention}": "mention",          # 発言者へのメンション
+    "{channel}": "channel",          # 発言したチャンネルのメンション
+    "{response_count}": "response_count",  # 登録されている応答の総数
+    "{date}": "date",                # JST の日付 (YYYY/MM/DD)
+    "{time}": "time",                # JST の時刻 (HH:MM)
+}
+
+PLACEHOLDER_PATTERN = re.compile("|".join(re.escape(p) for p in PLACEHOLDERS))
+
+
+class ResponseTemplate:
+    """
+    応答文を固定部分と差し込み部分に分けたもの。
+    segments は (直前の固定文字列, 値の名前) の並びで、最後の固定文字列は tail に持つ。
+    """
+    __slots__ = ("text", "segments", "tail", "fields")
+
+    def __init__(self, text, segments, tail):
+        self.text = text
+        self.segments = segments
+        self.tail = tail
+        self.fields = frozenset(name for _, name in segments)
+
+    def render(self, values):
+        parts = []
+        for literal, name in self.segments:
+            parts.append(literal)
+            parts.append(values[name])
+        parts.append(self.tail)
+        return "".join(parts)
+
+
+def compile_response(text):
+    """プレースホルダーを含む応答は ResponseTemplate に、含まない応答は None を返す（そのまま送れる）"""
+    if not isinstance(text, str):
+        return None
+    segments = []
+    pos = 0
+    for match in PLACEHOLDER_PATTERN.finditer(text):
+        segments.append((text[pos:match.start()], PLACEHOLDERS[match.group()]))
+        pos = match.end()
+    if not segments:
+        return None
+    return ResponseTemplate(text, tuple(segments), text[pos:])
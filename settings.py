@@ -0,0 +1,146 @@
+"""config.json を検証・索引化した読み取り専用の設定オブジェクト"""
+from types import MappingProxyType
+
+from response_limiter import SCOPES
+
+
+class SettingsError(ValueError):
+    """config.json の値の型・範囲が不正"""
+
+
+def _channel_id(raw, key):
+    value = raw.get(key)
+    if value in (None, "", 0):
+        return None
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise SettingsError(f"{key} must be an ID (integer), got {value!r}")
+    return value
+
+
+def _id_set(raw, key):
+    """ID のリスト（単独の ID も可）を frozenset にする。メッセージごとの判定を O(1) にするため"""
+    value = raw.get(key)
+    if value is None:
+        return frozenset()
+    if not isinstance(value, list):
+        value = [value]
+    return frozenset(_channel_id({key: v}, key) for v in value if v not in (None, "", 0))
+
+
+def _number(raw, key, default, minimum=0, kind=(int, float)):
+    value = raw.get(key, default)
+    if value is None:
+        return default
+    if isinstance(value, bool) or not isinstance(value, kind) or value < minimum:
+        raise SettingsError(f"{key} must be a number >= {minimum}, got {value!r}")
+    return value
+
+
+def _response_limits(raw):
+    value = raw.get("response_limits")
+    if value is None:
+        return None
+    if not isinstance(value, dict):
+        raise SettingsError(f"response_limits must be an object, got {value!r}")
+    for scope, overrides in SCOPES:
+        limits = [value.get(scope)] + list((value.get(overrides) or {}).values())
+        for limit in limits:
+            if limit is None:
+                continue
+            if not isinstance(limit, dict) or not all(
+                isinstance(limit.get(k), (int, float)) and limit.get(k) > 0 for k in ("rate", "burst")
+            ):
+                raise SettingsError(f"response_limits.{scope}: rate / burst must be positive numbers, got {limit!r}")
+    return value
+
+
+def _intro_fields(raw):
+    """{項目名: ラベル or [ラベル, ...]} の形だけ受け付ける（IntroParser に渡す前に検証する）"""
+    value = raw.get("intro_fields")
+    if value is None:
+        return None
+    if not isinstance(value, dict):
+        raise SettingsError(f"intro_fields must be an object, got {value!r}")
+    for field, labels in value.items():
+        if isinstance(labels, str):
+            labels = [labels]
+        if not isinstance(labels, list) or not labels or not all(isinstance(label, str) and label for label in labels):
+            raise SettingsError(f"intro_fields.{field} must be a label or a list of labels, got {labels!r}")
+    return value
+
+
+class Settings:
+    """
+    config.json の内容を読み込み時に一度だけ検証・変換したもの。作成後は変更できない。
+    チャンネル・管理者の判定は frozenset で行い、チャンネルオブジェクトは初回に引いて覚えておく。
+    再読み込みでは新しい Settings を作って config ごと差し替える（処理中のハンドラは古い方を見続ける）。
+    """
+    __slots__ = (
+        "raw", "allowed_channels", "admin_ids",
+        "intro_channel_id", "netatwi_channel_id", "log_channel_id", "system_log_channel_id",
+        "reaction_trigger", "min_reaction_count",
+        "netatwi_recent_window", "netatwi_scan_ttl", "netatwi_scan_interval",
+        "git_timeout", "log_retention_days", "log_batch_interval", "metrics_port", "github_url",
+        "intro_fields", "response_limits", "_get_channel", "_channels",
+    )
+
+    def __init__(self, raw=None, get_channel=None):
+        raw = raw if raw is not None else {}
+        if not isinstance(raw, dict):
+            raise SettingsError("config.json must be a JSON object")
+        intro_fields = _intro_fields(raw)
+        values = {
+            "raw": MappingProxyType(dict(raw)),
+            "allowed_channels": _id_set(raw, "allowed_channels"),
+            "admin_ids": _id_set(raw, "admin_user_id"),
+            "intro_channel_id": _channel_id(raw, "intro_channel_id"),
+            "netatwi_channel_id": _channel_id(raw, "netatwi_channel_id"),
+            "log_channel_id": _channel_id(raw, "log_channel_id"),
+            "system_log_channel_id": _channel_id(raw, "system_log_channel_id"),
+            "reaction_trigger": str(raw.get("reaction_trigger") or "🇳").strip(),
+            "min_reaction_count": _number(raw, "min_reaction_count", 1, kind=int),
+            "netatwi_recent_window": _number(raw, "netatwi_recent_window", 200, kind=int),
+            "netatwi_scan_ttl": _number(raw, "netatwi_scan_ttl", 600),
+            "netatwi_scan_interval": _number(raw, "netatwi_scan_interval", 360, minimum=1),
+            "git_timeout": _number(raw, "git_timeout", 60, minimum=1),
+            "log_retention_days": _number(raw, "log_retention_days", 30, kind=int),
+            "log_batch_interval": _number(raw, "log_batch_interval", 5.0),
+            "metrics_port": _number(raw, "metrics_port", None, minimum=1, kind=int),
+            "github_url": raw.get("github_url", "https://github.com/"),
+            "intro_fields": intro_fields,
+            "response_limits": _response_limits(raw),
+            "_get_channel": get_channel,
+            "_channels": {},
+        }
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Settings is read-only. Build a new one and swap it in.")
+
+    def is_admin(self, user_id):
+        return user_id in self.admin_ids
+
+    def is_allowed_channel(self, channel_id):
+        return channel_id in self.allowed_channels
+
+    def channel(self, name):
+        """
+        name ("intro" / "netatwi" / "log" / "system_log") のチャンネルを返す。未設定・未取得なら None。
+        見つかったものだけ覚えておく（ログイン前の None は覚えない）。
+        """
+        channel = self._channels.get(name)
+        if channel is None:
+            channel_id = getattr(self, f"{name}_channel_id")
+            if channel_id is None or self._get_channel is None:
+                return None
+            channel = self._get_channel(channel_id)
+            if channel is not None:
+                self._channels[name] = channel
+        return channel
+
+    def forget_channels(self):
+        """再接続でキャッシュが作り直されたときに、覚えていたチャンネルを捨てる"""
+        self._channels.clear()
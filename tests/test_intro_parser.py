@@ -0,0 +1,34 @@
+import json
+import os
+
+import pytest
+
+from intro_parser import UNSET, IntroParser
+
+CORPUS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bench", "intro_corpus.json")
+
+with open(CORPUS_FILE, encoding="utf-8") as f:
+    CORPUS = json.load(f)
+
+
+@pytest.mark.parametrize("sample", CORPUS, ids=[str(i) for i in range(len(CORPUS))])
+def test_corpus(sample):
+    assert IntroParser().parse(sample["text"]) == sample["expected"]
+
+
+def test_answer_on_the_next_line():
+    data = IntroParser().parse("【名前】\nやま\n【趣味】\n釣り")
+    assert data["name"] == "やま"
+    assert data["like"] == "釣り"
+    # 見出しだけが続く場合は次の見出しを値にしない
+    assert IntroParser().parse("【名前】\n【趣味】釣り")["name"] == UNSET
+
+
+def test_heading_in_the_middle_of_a_line_needs_a_colon():
+    assert IntroParser().parse("自己紹介です！名前：やま")["name"] == "やま"
+    assert IntroParser().parse("名前はまだ無い")["name"] == UNSET
+
+
+def test_custom_fields():
+    parser = IntroParser({"name": ["名前", "なまえ"], "game": "好きなゲーム"})
+    assert parser.parse("なまえ：すずき\n好きなゲーム：テトリス") == {"name": "すずき", "game": "テトリス"}
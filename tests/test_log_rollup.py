@@ -0,0 +1,35 @@
+import os
+
+from log_rollup import HEAD_BYTES, LogRollup
+
+
+def line(day, level, text):
+    return f"{day} 12:00:00,000 [{level}] {text}\n"
+
+
+def test_counts_only_appended_lines(tmp_path):
+    log = tmp_path / "bot_activity.log"
+    log.write_text(line("2026-10-01", "INFO", "a") + line("2026-10-01", "ERROR", "b"), encoding="utf-8")
+    rollup = LogRollup(str(log), str(tmp_path / "rollup.json"))
+    assert rollup.refresh() == 2
+    with open(log, "a", encoding="utf-8") as f:
+        f.write(line("2026-10-01", "WARNING", "c") + "2026-10-01 書きかけ")
+    assert rollup.refresh() == 1
+    assert rollup.day("2026-10-01") == {"OK": 1, "ERR": 1, "WARN": 1}
+    # 状態ファイルから続きを読める
+    assert LogRollup(str(log), str(tmp_path / "rollup.json")).refresh() == 0
+
+
+def test_rotation_with_a_long_first_line(tmp_path):
+    log = tmp_path / "bot_activity.log"
+    log.write_text(line("2026-10-01", "INFO", "x" * (HEAD_BYTES + 150)), encoding="utf-8")
+    rollup = LogRollup(str(log), str(tmp_path / "rollup.json"))
+    assert rollup.refresh() == 1
+    with open(log, "a", encoding="utf-8") as f:
+        f.write(line("2026-10-01", "ERROR", "d"))
+    # 未読の行を残したまま日次ローテーション
+    os.replace(log, tmp_path / "bot_activity.log.2026-10-01")
+    log.write_text(line("2026-10-02", "INFO", "e"), encoding="utf-8")
+    assert rollup.refresh() == 2
+    assert rollup.day("2026-10-01") == {"OK": 1, "ERR": 1, "WARN": 0}
+    assert rollup.day("2026-10-02") == {"OK": 1, "ERR": 0, "WARN": 0}
@@ -0,0 +1,84 @@
+"""bench/fake_discord の代役で main.on_message を通しで動かすスモークテスト"""
+import asyncio
+import json
+import os
+
+import pytest
+
+from fake_discord import FakeChannel, FakeClient, FakeMessage, FakeUser
+
+MAIN_CHANNEL_ID = 1001
+INTRO_CHANNEL_ID = 1002
+OTHER_CHANNEL_ID = 1003
+LOG_CHANNEL_ID = 1004
+
+RESPONSES = """\
+こんにちは:
+  - こんにちは、[userName]さん！
+めめ鯖くじ:
+  - 大吉
+"""
+
+
+@pytest.fixture(scope="module")
+def bot(tmp_path_factory):
+    workdir = tmp_path_factory.mktemp("bot")
+    (workdir / "responses.yml").write_text(RESPONSES, encoding="utf-8")
+    (workdir / "config.json").write_text(json.dumps({
+        "allowed_channels": [MAIN_CHANNEL_ID],
+        "intro_channel_id": INTRO_CHANNEL_ID,
+        "log_channel_id": LOG_CHANNEL_ID,
+        "admin_user_id": [9],
+        "response_limits": {"user": None, "channel": None, "trigger": None, "coalesce_seconds": 0},
+    }), encoding="utf-8")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    os.environ["DISCORD_TOKEN"] = ""  # client.run() させない
+    try:
+        import main
+        main.startup_loader.join()
+        fake = FakeClient()
+        channels = {
+            "main": fake.add_channel(FakeChannel(MAIN_CHANNEL_ID, "main")),
+            "intro": fake.add_channel(FakeChannel(INTRO_CHANNEL_ID, "intro")),
+            "other": fake.add_channel(FakeChannel(OTHER_CHANNEL_ID, "other")),
+            "log": fake.add_channel(FakeChannel(LOG_CHANNEL_ID, "log")),
+        }
+        main.client.get_channel = fake.get_channel
+        yield main, channels
+        main.user_intros.flush_now()
+    finally:
+        os.chdir(cwd)
+
+
+def test_trigger_reply_and_log(bot):
+    main, channels = bot
+    user = FakeUser(100, "やまだ")
+
+    async def scenario():
+        await main.on_message(FakeMessage(channels["main"], user, "みんなこんにちは"))
+        await main.on_message(FakeMessage(channels["main"], user, "ただの雑談"))
+        await main.on_message(FakeMessage(channels["other"], user, "めめ鯖くじ"))
+        await main.log_publisher.flush()
+
+    asyncio.run(scenario())
+    assert channels["main"].sent == ["こんにちは、やまださん！"]
+    assert channels["other"].sent == []
+    assert len(channels["log"].sent) == 1
+    assert "こんにちは" in channels["log"].sent[0].description
+
+
+def test_intro_is_saved_and_searchable(bot):
+    main, channels = bot
+    user = FakeUser(200, "tanaka")
+    intro = FakeMessage(channels["intro"], user, "【名前】：たなか\n【趣味】：釣り")
+
+    async def scenario():
+        await main.on_message(intro)
+        await main.on_message(FakeMessage(channels["main"], user, "!user-info たなか"))
+
+    asyncio.run(scenario())
+    assert intro.added_reactions == ["✅"]
+    assert main.user_intros.resolve("200") is not None
+    embed = channels["main"].sent[-1]
+    assert any(field.value == "釣り" for field in embed.fields)
@@ -0,0 +1,52 @@
+import pytest
+
+from netatwi_store import NetatwiStore
+
+
+def entry(message_id, content, count=1, author_id=1):
+    return {"message_id": message_id, "author_id": author_id, "author_name": f"user{author_id}",
+            "content": content, "count": count, "created_at": None}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = NetatwiStore(str(tmp_path / "netatwi.db"))
+    yield store
+    store.close()
+
+
+def test_upsert_and_delete_report_pool_changes(store):
+    assert store.upsert(10, entry(1, "ネタA")) == ("ネタA", None)
+    # 同じ本文の別メッセージはプールを増やさない
+    assert store.upsert(10, entry(2, "ネタA")) == (None, None)
+    # 編集で本文が変わった場合
+    assert store.upsert(10, entry(3, "ネタB")) == ("ネタB", None)
+    assert store.upsert(10, entry(3, "ネタC")) == ("ネタC", "ネタB")
+    assert store.delete(1) is None  # メッセージ 2 が同じ本文を持っている
+    assert store.delete(2) == "ネタA"
+    assert store.delete(999) is None
+    assert store.texts(10) == ["ネタC"]
+
+
+def test_checkpoint_and_rollback(store):
+    store.upsert(10, entry(1, "ネタA"))
+    store.set_checkpoint(10, 1)
+    store.commit()
+
+    store.clear_channel(10)
+    store.upsert(10, entry(2, "ネタB"))
+    store.rollback()
+    assert store.texts(10) == ["ネタA"]
+    assert store.get_checkpoint(10) == 1
+
+
+def test_queries(store):
+    for message_id, author_id in ((1, 1), (2, 1), (3, 2)):
+        store.upsert(10, entry(message_id, f"ネタ{message_id}", count=message_id, author_id=author_id))
+    store.upsert(20, entry(4, "別チャンネル"))
+    assert store.get(3)["count"] == 3
+    assert store.get(99) is None
+    assert store.message_ids_between(10, 2, 3) == [2, 3]
+    assert store.author_counts(10) == {"user1": 2, "user2": 1}
+    assert store.texts() == ["ネタ1", "ネタ2", "ネタ3", "別チャンネル"]
+    assert store.count() == 4
@@ -0,0 +1,49 @@
+from response_limiter import ResponseLimiter
+
+NO_COALESCE = {"user": {"rate": 0.2, "burst": 3}, "channel": None, "trigger": None, "coalesce_seconds": 0}
+
+
+def test_coalesces_only_the_same_users_repeats():
+    limiter = ResponseLimiter()
+    assert limiter.check(1, 100, "めめ鯖くじ", now=0.0) == "ok"
+    assert limiter.check(1, 100, "めめ鯖くじ", now=1.0) == "coalesced"
+    # 別の人のくじはまとめない
+    assert limiter.check(1, 200, "めめ鯖くじ", now=1.0) == "ok"
+    assert limiter.check(1, 300, "めめ鯖くじ", now=2.9) == "ok"
+    # 別のチャンネル・期間後は応答する
+    assert limiter.check(2, 100, "めめ鯖くじ", now=1.0) == "ok"
+    assert limiter.check(1, 100, "めめ鯖くじ", now=3.5) == "ok"
+
+
+def test_user_bucket_cools_down_and_refills():
+    limiter = ResponseLimiter(NO_COALESCE)
+    assert [limiter.check(1, 100, "HTTP", now=0.0) for _ in range(4)] == ["ok", "ok", "ok", "cooldown"]
+    assert limiter.check(1, 200, "HTTP", now=0.0) == "ok"
+    # 0.2 回/秒 なので 5 秒で1回分戻る
+    assert limiter.check(1, 100, "HTTP", now=5.0) == "ok"
+    assert limiter.check(1, 100, "HTTP", now=5.0) == "cooldown"
+
+
+def test_per_trigger_override():
+    limiter = ResponseLimiter(dict(NO_COALESCE, user=None, triggers={"めめ鯖くじ": {"rate": 0.1, "burst": 1}}))
+    assert limiter.check(1, 100, "めめ鯖くじ", now=0.0) == "ok"
+    assert limiter.check(1, 200, "めめ鯖くじ", now=1.0) == "cooldown"
+    assert limiter.check(1, 200, "HTTP", now=1.0) == "ok"
+
+
+def test_partial_settings_keep_the_default_buckets():
+    limiter = ResponseLimiter({"triggers": {"めめ鯖くじ": {"rate": 0.1, "burst": 1}}, "coalesce_seconds": 0})
+    # user は既定の burst 3 のまま
+    assert [limiter.check(1, 100, "HTTP", now=0.0) for _ in range(4)] == ["ok", "ok", "ok", "cooldown"]
+
+
+def test_unlimited_and_idle_buckets_are_dropped():
+    limiter = ResponseLimiter({"user": None, "channel": None, "trigger": None, "coalesce_seconds": 0})
+    assert all(limiter.check(1, 100, "HTTP", now=0.0) == "ok" for _ in range(100))
+    assert len(limiter) == 0
+
+    limiter = ResponseLimiter()
+    for user_id in range(1000):
+        limiter.check(1, user_id, "HTTP", now=float(user_id))
+    # 満タンに戻ったバケットは捨てるので、直近の利用者の分しか持たない
+    assert len(limiter) < 100
@@ -0,0 +1,48 @@
+import hashlib
+
+from response_snapshot import read_snapshot, snapshot_supported, write_snapshot
+from trigger_matcher import TriggerMatcher
+
+DATA = {
+    "こんにちは": ["こんにちは、[userName]さん！", "やあ"],
+    "めめ鯖くじ": ["大吉", "凶", "大吉"],
+    "空": [],
+    "ネタツイ": ["{date} のネタ", "絵文字 🎉 も入る"],
+}
+DIGEST = hashlib.sha256(b"responses.yml").hexdigest()
+
+
+def write(tmp_path, data=DATA):
+    path = str(tmp_path / "responses.snapshot")
+    write_snapshot(path, DIGEST, data, TriggerMatcher(data.keys()))
+    return path
+
+
+def test_round_trip(tmp_path):
+    snapshot = read_snapshot(write(tmp_path), DIGEST)
+    assert snapshot.sections == DATA
+    assert snapshot.triggers == list(DATA)
+    assert snapshot.tables == TriggerMatcher(DATA.keys()).tables()
+    assert snapshot.static_texts == {"やあ", "大吉", "凶", "絵文字 🎉 も入る"}
+
+
+def test_restored_tables_drive_a_matcher(tmp_path):
+    snapshot = read_snapshot(write(tmp_path), DIGEST)
+    matcher = TriggerMatcher(snapshot.triggers, snapshot.tables)
+    assert matcher.find_first("今日のめめ鯖くじ") == "めめ鯖くじ"
+
+
+def test_stale_missing_or_broken_snapshot_is_ignored(tmp_path):
+    path = write(tmp_path)
+    assert read_snapshot(path, hashlib.sha256(b"changed").hexdigest()) is None
+    assert read_snapshot(str(tmp_path / "missing"), DIGEST) is None
+    with open(path, "r+b") as f:
+        f.truncate(100)
+    assert read_snapshot(path, DIGEST) is None
+
+
+def test_only_plain_sections_are_supported():
+    assert snapshot_supported(DATA)
+    assert not snapshot_supported({"a": None})
+    assert not snapshot_supported({"a": ["x", 1]})
+    assert not snapshot_supported(["a"])
@@ -0,0 +1,43 @@
+import random
+
+from trigger_matcher import TriggerMatcher
+
+
+def naive_first(triggers, text):
+    """置き換え前の判定（ファイル順に `trigger in text`）"""
+    for trigger in triggers:
+        if trigger in text:
+            return trigger
+    return None
+
+
+def test_matches_naive_search_on_random_text():
+    rng = random.Random(0)
+    alphabet = "あいうえおab"
+    for _ in range(50):
+        triggers = list(dict.fromkeys(
+            "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(1, 12))
+        ))
+        matcher = TriggerMatcher(triggers)
+        for _ in range(40):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 20)))
+            assert matcher.find_first(text) == naive_first(triggers, text), (triggers, text)
+
+
+def test_file_order_wins_over_position_in_text():
+    matcher = TriggerMatcher(["くじ", "めめ鯖くじ", "こんにちは"])
+    assert matcher.find_first("こんにちは、めめ鯖くじ") == "くじ"
+    assert matcher.find_first("なにもない") is None
+
+
+def test_empty_trigger_always_matches_and_non_str_is_ignored():
+    assert TriggerMatcher(["abc", ""]).find_first("xyz") == ""
+    assert TriggerMatcher([1, "abc"]).triggers == ["abc"]
+
+
+def test_tables_round_trip():
+    matcher = TriggerMatcher(["HTTP", "ネタツイ", "教えてTips"])
+    restored = TriggerMatcher(matcher.triggers, matcher.tables())
+    for text in ("ネタツイください", "HTTPとTips", "教えてTipsを"):
+        assert restored.find_first(text) == matcher.find_first(text)
+    assert restored.state_count == matcher.state_count
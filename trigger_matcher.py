@@ -0,0 +1,93 @@
+"""自動応答トリガーの一括マッチャー (Aho-Corasick)"""
+
+
+class TriggerMatcher:
+    """
+    responses.yml の全トリガーから一度だけオートマトンを構築し、
+    メッセージを1回走査するだけで「ファイル順で最初のトリガー」を求める。
+    従来の `for trigger in cached_responses: if trigger in content` と同じ結果を返す。
+    """
+
+    def __init__(self, triggers, tables=None):
+        self.triggers = [t for t in triggers if isinstance(t, str)]
+        # 状態ごとの遷移表・失敗リンク・到達可能な最小トリガー番号
+        self._goto = [{}]
+        self._fail = [0]
+        self._best = [None]
+        # 走査コストの累計（トリガー数が増えても1文字あたりの手数が一定かを確認する用）
+        self.stats = {"scans": 0, "chars": 0, "steps": 0}
+        self.last_cost = 0
+        if tables is not None:
+            # スナップショットに保存済みの表をそのまま使う（構築を省く）
+            self._goto, self._fail, self._best = tables
+        else:
+            self._build()
+
+    def tables(self):
+        """構築済みの (遷移表, 失敗リンク, 最小トリガー番号) を返す（スナップショット保存用）"""
+        return self._goto, self._fail, self._best
+
+    @property
+    def state_count(self):
+        return len(self._goto)
+
+    def _build(self):
+        goto, best = self._goto, self._best
+        for index, trigger in enumerate(self.triggers):
+            state = 0
+            for ch in trigger:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto.append({})
+                    self._fail.append(0)
+                    best.append(None)
+                    goto[state][ch] = nxt
+                state = nxt
+            if best[state] is None or index < best[state]:
+                best[state] = index
+
+        # 幅優先で失敗リンクを張り、失敗先の出力もまとめておく
+        queue = list(goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in goto[f]:
+                    f = self._fail[f]
+                target = goto[f].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                inherited = best[self._fail[nxt]]
+                if inherited is not None and (best[nxt] is None or inherited < best[nxt]):
+                    best[nxt] = inherited
+
+    def find_first(self, text):
+        """text に含まれるトリガーのうち、ファイル順で最初のものを返す（無ければ None）"""
+        goto, fail, best = self._goto, self._fail, self._best
+        winner = best[0]  # 空文字トリガーは常に一致
+        state = 0
+        steps = 0
+        for ch in text:
+            if winner == 0:
+                break
+            while state and ch not in goto[state]:
+                state = fail[state]
+                steps += 1
+            state = goto[state].get(ch, 0)
+            steps += 1
+            hit = best[state]
+            if hit is not None and (winner is None or hit < winner):
+                winner = hit
+
+        self.last_cost = steps
+        self.stats["scans"] += 1
+        self.stats["chars"] += len(text)
+        self.stats["steps"] += steps
+        return self.triggers[winner] if winner is not None else None
+
+    def steps_per_char(self):
+        chars = self.stats["chars"]
+        return self.stats["steps"] / chars if chars else 0.0
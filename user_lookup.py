@@ -0,0 +1,137 @@
+"""!user-info 用のユーザー名検索インデックス（正規化 + 前方一致 + あいまい検索）"""
+import bisect
+import unicodedata
+
+
+def normalize_name(text):
+    """NFKC（全角/半角の統一）・小文字化・カタカナ→ひらがな・空白除去"""
+    text = unicodedata.normalize("NFKC", str(text)).lower()
+    chars = []
+    for ch in text:
+        code = ord(ch)
+        if 0x30A1 <= code <= 0x30F6:  # ァ〜ヶ → ぁ〜ゖ
+            ch = chr(code - 0x60)
+        if not ch.isspace():
+            chars.append(ch)
+    return "".join(chars)
+
+
+def bigrams(text):
+    if len(text) < 2:
+        return {text} if text else set()
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def edit_distance(a, b, limit):
+    """レーベンシュタイン距離（limit を超えたら limit + 1 を返して打ち切る）"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        if min(cur) > limit:
+            return limit + 1
+        prev = cur
+    return prev[-1]
+
+
+class UserLookupIndex:
+    """
+    正規化した名前 → ユーザーID の索引。
+    完全一致・前方一致（ソート済みキーの二分探索）・bigram 候補 + 編集距離のあいまい一致を順位付きで返す。
+    """
+
+    def __init__(self):
+        self.users = {}   # user_id -> 正規化済みの名前の set
+        self.keys = {}    # 正規化済みの名前 -> user_id の set
+        self.sorted_keys = []
+        self.grams = {}   # bigram -> 正規化済みの名前の set
+
+    def __len__(self):
+        return len(self.users)
+
+    def set_user(self, user_id, names):
+        """ユーザーの検索名を差し替える（追加・更新時に呼ぶ）"""
+        user_id = str(user_id)
+        new_keys = {normalize_name(n) for n in names if n}
+        new_keys.discard("")
+        old_keys = self.users.get(user_id, set())
+        for key in old_keys - new_keys:
+            self._unlink(key, user_id)
+        for key in new_keys - old_keys:
+            self._link(key, user_id)
+        self.users[user_id] = new_keys
+
+    def _link(self, key, user_id):
+        owners = self.keys.get(key)
+        if owners is None:
+            owners = self.keys[key] = set()
+            bisect.insort(self.sorted_keys, key)
+            for gram in bigrams(key):
+                self.grams.setdefault(gram, set()).add(key)
+        owners.add(user_id)
+
+    def _unlink(self, key, user_id):
+        owners = self.keys.get(key)
+        if not owners:
+            return
+        owners.discard(user_id)
+        if not owners:
+            del self.keys[key]
+            i = bisect.bisect_left(self.sorted_keys, key)
+            if i < len(self.sorted_keys) and self.sorted_keys[i] == key:
+                del self.sorted_keys[i]
+            for gram in bigrams(key):
+                keys = self.grams.get(gram)
+                if keys:
+                    keys.discard(key)
+                    if not keys:
+                        del self.grams[gram]
+
+    def search(self, query, limit=5):
+        """
+        候補を [(user_id, score, 一致した名前)] でスコアの高い順に返す。
+        完全一致 1.0 > 前方一致 0.9 前後 > あいまい一致 0.8 未満。
+        """
+        q = normalize_name(query)
+        if not q:
+            return []
+        best = {}
+
+        def offer(key, score):
+            for user_id in self.keys.get(key, ()):
+                if user_id not in best or best[user_id][0] < score:
+                    best[user_id] = (score, key)
+
+        if q in self.keys:
+            offer(q, 1.0)
+
+        # 前方一致: "やま" → "やまだ"（短い名前ほど上位）
+        i = bisect.bisect_left(self.sorted_keys, q)
+        scanned = 0
+        while i < len(self.sorted_keys) and self.sorted_keys[i].startswith(q) and scanned < 50:
+            key = self.sorted_keys[i]
+            if key != q:
+                offer(key, 0.9 - 0.05 * min(len(key) - len(q), 2) / 2)
+            i += 1
+            scanned += 1
+
+        # あいまい一致: bigram を共有する名前だけを編集距離で評価する
+        q_grams = bigrams(q)
+        shared = {}
+        for gram in q_grams:
+            for key in self.grams.get(gram, ()):
+                shared[key] = shared.get(key, 0) + 1
+        limit_distance = max(1, len(q) // 3)
+        for key, common in sorted(shared.items(), key=lambda kv: -kv[1])[:200]:
+            dice = 2 * common / (len(q_grams) + len(bigrams(key)))
+            if dice < 0.3:
+                continue
+            distance = edit_distance(q, key, limit_distance)
+            if distance <= limit_distance:
+                offer(key, min(0.79, 0.7 * (1 - distance / (len(q) + 1)) + 0.1 * dice))
+
+        ranked = sorted(best.items(), key=lambda kv: (-kv[1][0], kv[1][1]))
+        return [(user_id, score, key) for user_id, (score, key) in ranked[:limit]]